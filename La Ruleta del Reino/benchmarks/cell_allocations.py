@@ -0,0 +1,144 @@
+# Measure allocations per panel for the cell containers.
+#
+# Compares the old way of building a panel (a new container and new
+# border/shadow objects for every cell and every state change) with the
+# shared styles and the recycled CellPool.
+#
+# Run from the project folder:
+#   python benchmarks/cell_allocations.py
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import flet as ft
+
+from cells import CellPool, style_cell
+from panel_state import PENDING, REVEALED, PanelState
+
+PHRASES = [
+    "EL QUE MUCHO ABARCA POCO APRIETA",
+    "A CABALLO REGALADO NO LE MIRES EL DIENTE",
+    "MÁS VALE PÁJARO EN MANO QUE CIENTO VOLANDO",
+    "CAMARÓN QUE SE DUERME SE LO LLEVA LA CORRIENTE",
+]
+LETTER_WIDTH = 40
+ROUNDS = 50
+
+
+# Cell as it was built before the style cache and the pool
+def legacy_cell(char):
+    if char == ' ':
+        return ft.Container(
+            width=LETTER_WIDTH,
+            height=LETTER_WIDTH * 1.5,
+            margin=2,
+            bgcolor=ft.Colors.TRANSPARENT,
+        )
+    return ft.Container(
+        width=LETTER_WIDTH,
+        height=LETTER_WIDTH * 1.5,
+        margin=2,
+        bgcolor=ft.Colors.WHITE,
+        border=ft.border.all(2, ft.Colors.BLUE_800),
+        border_radius=5,
+        alignment=ft.alignment.center,
+        content=ft.Text(
+            value=char if not char.isalnum() else "",
+            size=int(LETTER_WIDTH * 0.6),
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.BLACK,
+        ),
+        shadow=ft.BoxShadow(
+            spread_radius=1,
+            blur_radius=4,
+            color=ft.Colors.BLUE_GREY_300,
+            offset=ft.Offset(2, 2)
+        ),
+    )
+
+
+# One round with the old code: build the panel, highlight and reveal every letter
+def legacy_round(phrase):
+    state = PanelState(phrase)
+    cells = [legacy_cell(char) for char in state.phrase]
+    for index in range(len(state)):
+        if not state.phrase[index].isalnum():
+            continue
+        cell = cells[index]
+        cell.bgcolor = "#FFF176"
+        cell.shadow = ft.BoxShadow(spread_radius=1, blur_radius=6, color="#FFD54F80", offset=ft.Offset(0, 0))
+        cell.bgcolor = ft.Colors.WHITE
+        cell.border = ft.border.all(2, ft.Colors.BLUE_800)
+        cell.shadow = ft.BoxShadow(spread_radius=1, blur_radius=4, color=ft.Colors.BLUE_GREY_300, offset=ft.Offset(2, 2))
+        cell.content.value = state.phrase[index]
+    return cells
+
+
+# The same round with shared styles and cells recycled from the pool
+def pooled_round(phrase, pool, cells):
+    state = PanelState(phrase)
+    cells = pool.recycle(cells, len(state), LETTER_WIDTH)
+    for index, cell in enumerate(cells):
+        style_cell(cell, state.states[index], state.phrase[index])
+    for index in range(len(state)):
+        if not state.phrase[index].isalnum():
+            continue
+        style_cell(cells[index], PENDING, "")
+        style_cell(cells[index], REVEALED, state.phrase[index])
+    return cells
+
+
+# Run the rounds and return (flet objects created per panel, peak KiB of the run).
+# Objects are counted as __init__ calls of flet classes (controls, borders,
+# shadows, offsets), which is what the style cache and the pool avoid.
+def measure(run_round):
+    flet_dir = os.path.dirname(ft.__file__)
+    created = 0
+
+    def profile(frame, event, arg):
+        nonlocal created
+        if event == "call" and frame.f_code.co_name == "__init__" \
+                and frame.f_code.co_filename.startswith(flet_dir):
+            created += 1
+
+    tracemalloc.start()
+    sys.setprofile(profile)
+    try:
+        run_round()
+    finally:
+        sys.setprofile(None)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    panels = ROUNDS * len(PHRASES)
+    return created / panels, peak / 1024
+
+
+def main():
+    def run_legacy():
+        for _ in range(ROUNDS):
+            for phrase in PHRASES:
+                legacy_round(phrase)
+
+    pool = CellPool()
+    cells = []
+
+    def run_pooled():
+        nonlocal cells
+        for _ in range(ROUNDS):
+            for phrase in PHRASES:
+                cells = pooled_round(phrase, pool, cells)
+
+    legacy_objects, legacy_peak = measure(run_legacy)
+    pooled_objects, pooled_peak = measure(run_pooled)
+
+    print(f"{'':>8} {'objects/panel':>14} {'peak KiB':>10}")
+    print(f"{'before':>8} {legacy_objects:>14.1f} {legacy_peak:>10.1f}")
+    print(f"{'after':>8} {pooled_objects:>14.1f} {pooled_peak:>10.1f}")
+    print(f"cells created by the pool: {pool.created} for {ROUNDS * len(PHRASES)} panels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# Benchmarks for the layout, guessing and reveal hot paths.
+#
+# Times each path for phrase lengths from 10 to 500 characters at the mobile
+# (8 columns) and desktop (12 columns) layouts, at two levels:
+#   engine  - panel_state only: the greedy word wrap and the balanced layout
+#             (uncached), one guess lookup, reveal next, reveal all
+#   handler - the app's handlers on a stub page (see stub_page.py), including
+#             the control updates built for the client
+# Results are written as JSON so runs of different versions can be compared.
+#
+# Run from the project folder:
+#   python benchmarks/hot_paths.py --output bench.json
+#   python benchmarks/hot_paths.py --output new.json --compare bench.json
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import flet as ft
+
+from stub_page import StubSession  # Also puts src/ on the import path
+from panel_state import PanelState, balanced_rows, board_capacities, wrap_phrase
+
+LENGTHS = (10, 25, 50, 100, 250, 500)
+LAYOUTS = {8: 300, 12: 1000}  # max_chars_per_row -> window width that selects it
+GUESS = "A"
+
+WORDS = (
+    "LA EL DE QUE CASA PERRO GATO CABALLO REGALADO DIENTE PÁJARO MANO CIENTO "
+    "VOLANDO CAMARÓN DUERME CORRIENTE PIÑATA CANCIÓN ÁRBOL MURCIÉLAGO MADRUGA "
+    "EXTRAORDINARIAMENTE SOL LUNA MAR"
+).split()
+
+
+# Deterministic phrase of about length characters
+def make_phrase(length, seed=0):
+    rng = random.Random(seed + length)
+    words = []
+    size = -1
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length].strip()
+
+
+# Time fn repeats times; setup (untimed) runs before each call and its
+# result is passed to fn. Returns the timings in microseconds.
+def measure(fn, setup=lambda: None, repeats=50):
+    timings = []
+    for _ in range(repeats):
+        argument = setup()
+        start = time.perf_counter()
+        fn(argument)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def engine_benchmarks(phrase, width, repeats):
+    results = {}
+    results["wrap"] = measure(lambda _: wrap_phrase(phrase, width), repeats=repeats)
+    board = board_capacities(width)
+    results["balanced"] = measure(lambda _: balanced_rows(phrase, board), repeats=repeats)
+
+    def guessed_state():
+        state = PanelState(phrase)
+        state.guess(GUESS)
+        return state
+
+    results["guess"] = measure(lambda state: state.guess(GUESS), lambda: PanelState(phrase), repeats)
+    results["reveal_next"] = measure(lambda state: state.reveal_next(), guessed_state, repeats)
+    results["reveal_all"] = measure(lambda state: state.reveal_all(), guessed_state, repeats)
+    return results
+
+
+def handler_benchmarks(session, phrase, repeats):
+    results = {}
+
+    def new_panel():
+        session.start(phrase)
+
+    def guessed_panel():
+        session.start(phrase)
+        session.guess(GUESS)
+
+    results["create_panel"] = measure(lambda _: session.start(phrase), repeats=repeats)
+
+    def guess(_):
+        session.guess_field.value = GUESS
+        session.click(session.guess_button)
+
+    results["guess_letter"] = measure(guess, new_panel, repeats)
+    results["reveal_next_letter"] = measure(lambda _: session.next(), guessed_panel, repeats)
+    results["reveal_all_letters"] = measure(lambda _: session.solve(), guessed_panel, repeats)
+    return results
+
+
+def summarize(level, path, length, width, timings):
+    return {
+        "level": level,
+        "path": path,
+        "length": length,
+        "max_chars_per_row": width,
+        "repeats": len(timings),
+        "median_us": statistics.median(timings),
+        "min_us": min(timings),
+        "p90_us": sorted(timings)[int(0.9 * (len(timings) - 1))],
+    }
+
+
+def run(repeats, lengths):
+    results = []
+    for width, window_width in LAYOUTS.items():
+        session = StubSession(f"bench-{width}")
+        session.resize(window_width)
+        for length in lengths:
+            phrase = make_phrase(length)
+            for path, timings in engine_benchmarks(phrase, width, repeats).items():
+                results.append(summarize("engine", path, len(phrase), width, timings))
+            for path, timings in handler_benchmarks(session, phrase, repeats).items():
+                results.append(summarize("handler", path, len(phrase), width, timings))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "flet": ft.version.version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+# Compare with an earlier run; returns the results that got slower than threshold
+def compare(current, baseline, threshold):
+    key = lambda r: (r["level"], r["path"], r["length"], r["max_chars_per_row"])
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(key(result))
+        if not old or not old["median_us"]:
+            continue
+        ratio = result["median_us"] / old["median_us"]
+        result["baseline_median_us"] = old["median_us"]
+        result["ratio"] = ratio
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def print_report(report):
+    print(f"{'level':>8} {'path':>20} {'cols':>5} {'length':>7} {'median us':>10} {'p90 us':>10} {'ratio':>7}")
+    for r in report["results"]:
+        ratio = f"{r['ratio']:.2f}" if "ratio" in r else ""
+        print(f"{r['level']:>8} {r['path']:>20} {r['max_chars_per_row']:>5} {r['length']:>7} "
+              f"{r['median_us']:>10.1f} {r['p90_us']:>10.1f} {ratio:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the layout, guess and reveal hot paths")
+    parser.add_argument("--output", default="bench.json", help="JSON file for the results")
+    parser.add_argument("--repeats", type=int, default=30, help="timed runs per benchmark")
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(LENGTHS), help="phrase lengths")
+    parser.add_argument("--compare", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    report = run(args.repeats, args.lengths)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.threshold}x the baseline:")
+        for r in regressions:
+            print(f"  {r['level']} {r['path']} cols={r['max_chars_per_row']} length={r['length']}: "
+                  f"{r['baseline_median_us']:.1f} -> {r['median_us']:.1f} us")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Multi-session load test for the web deployment.
+#
+# Runs main(page) for N simulated sessions against the local stub client
+# (see stub_page.py) and plays scripted rounds on each one: enter a phrase,
+# guess letters, click "Siguiente" until every match is revealed, then
+# "Resolver". With --keyboard the guesses and "Siguiente" are key presses in
+# keyboard mode instead of the guess field and button. Reports handler latency (p50/p99), memory per session and the
+# update payload each action sends to the client.
+#
+# Run from the project folder:
+#   python benchmarks/load_test.py --sessions 200 --rounds 3
+#   python benchmarks/load_test.py --sessions 200 --json load.json
+#   python benchmarks/load_test.py --sessions 200 --keyboard
+import argparse
+import json
+import math
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+from stub_page import StubSession
+
+PHRASES = [
+    "HOLA MUNDO",
+    "EL QUE MUCHO ABARCA POCO APRIETA",
+    "A CABALLO REGALADO NO LE MIRES EL DIENTE",
+    "MÁS VALE PÁJARO EN MANO QUE CIENTO VOLANDO",
+    "CAMARÓN QUE SE DUERME SE LO LLEVA LA CORRIENTE",
+    "EN UN LUGAR DE LA MANCHA DE CUYO NOMBRE NO QUIERO ACORDARME",
+    "AL MAL TIEMPO, BUENA CARA",
+    "LA PIÑA ES UNA FRUTA TROPICAL",
+]
+GUESSES = "EAOSRNILDTUCMP"
+
+
+# Latencies (seconds) and payloads (bytes) recorded for each action
+class ActionStats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.payloads = defaultdict(list)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+# Run one action on a session, recording its latency and payload
+def timed(stats, session, action, handler, *args):
+    bytes_before = session.connection.bytes_sent
+    start = time.perf_counter()
+    handler(*args)
+    stats.latencies[action].append(time.perf_counter() - start)
+    stats.payloads[action].append(session.connection.bytes_sent - bytes_before)
+
+
+# Play one scripted round on a session
+def play_round(session, stats, phrase, guesses):
+    timed(stats, session, "Comenzar", session.start, phrase)
+    for letter in guesses:
+        if session.keyboard:
+            timed(stats, session, "Adivinar", session.key, letter)
+        else:
+            timed(stats, session, "Adivinar", session.guess, letter)
+        while session.has_pending:
+            if session.keyboard:
+                timed(stats, session, "Siguiente", session.key, "Enter")
+            else:
+                timed(stats, session, "Siguiente", session.next)
+    timed(stats, session, "Resolver", session.solve)
+
+
+# Open the sessions with memory tracing on, returning them and the memory per session
+def open_sessions(count, keyboard=False):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = [StubSession(f"session-{n}") for n in range(count)]
+    # Count a panel on screen as part of a session's footprint
+    for session in sessions:
+        session.start(PHRASES[0])
+        if keyboard:
+            session.use_keyboard()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sessions, (after - before) / count
+
+
+def run(sessions_count, rounds, guesses_per_round, seed, keyboard=False):
+    sessions, memory_per_session = open_sessions(sessions_count, keyboard)
+    messages_before = sum(session.connection.messages_sent for session in sessions)
+
+    stats = ActionStats()
+    start = time.perf_counter()
+    # Interleave the sessions round by round. The handlers are async and Flet runs
+    # them one at a time on the page's event loop, so they never overlap.
+    rngs = [random.Random(seed + n) for n in range(sessions_count)]
+    for _ in range(rounds):
+        for session, rng in zip(sessions, rngs):
+            play_round(session, stats, rng.choice(PHRASES), rng.sample(GUESSES, guesses_per_round))
+    elapsed = time.perf_counter() - start
+
+    actions = {}
+    for action, latencies in stats.latencies.items():
+        payloads = stats.payloads[action]
+        actions[action] = {
+            "count": len(latencies),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": max(latencies) * 1000,
+            "mean_payload_bytes": sum(payloads) / len(payloads),
+            "p99_payload_bytes": percentile(payloads, 99),
+        }
+    total_actions = sum(action["count"] for action in actions.values())
+    return {
+        "sessions": sessions_count,
+        "rounds": rounds,
+        "guesses_per_round": guesses_per_round,
+        "keyboard": keyboard,
+        "elapsed_s": elapsed,
+        "actions_per_s": total_actions / elapsed if elapsed else 0.0,
+        "memory_per_session_kib": memory_per_session / 1024,
+        "messages_sent": sum(session.connection.messages_sent for session in sessions) - messages_before,
+        "actions": actions,
+    }
+
+
+def print_report(result):
+    print(f"{result['sessions']} sessions, {result['rounds']} rounds each, "
+          f"{result['elapsed_s']:.2f}s, "
+          f"{result['actions_per_s']:.0f} actions/s")
+    print(f"memory per session: {result['memory_per_session_kib']:.1f} KiB")
+    print(f"{'action':>10} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'avg bytes':>10} {'p99 bytes':>10}")
+    for name, action in result["actions"].items():
+        print(f"{name:>10} {action['count']:>7} {action['p50_ms']:>8.3f} {action['p99_ms']:>8.3f} "
+              f"{action['max_ms']:>8.3f} {action['mean_payload_bytes']:>10.0f} "
+              f"{action['p99_payload_bytes']:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test main(page) with simulated sessions")
+    parser.add_argument("--sessions", type=int, default=200, help="number of simulated sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds played by each session")
+    parser.add_argument("--guesses", type=int, default=6, help="letters guessed per round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keyboard", action="store_true", help="guess with key presses in keyboard mode")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    result = run(args.sessions, args.rounds, args.guesses, args.seed, args.keyboard)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
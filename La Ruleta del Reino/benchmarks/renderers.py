@@ -0,0 +1,116 @@
+# Container renderer vs canvas renderer (see canvas_panel.py).
+#
+# Plays the same round with each renderer on a stub session (see
+# stub_page.py): enter a phrase, guess letters, "Siguiente" until every match
+# is revealed, then "Resolver". Reports the controls the panel puts on the
+# client (canvas shapes count as controls, they are sent the same way) and
+# the update payload and handler time of each action.
+#
+# Run from the project folder:
+#   python benchmarks/renderers.py
+#   python benchmarks/renderers.py --json renderers.json
+import argparse
+import json
+import time
+from collections import defaultdict
+
+import flet as ft
+
+from stub_page import StubSession, find_controls
+
+PHRASES = [
+    "HOLA MUNDO",
+    "MÁS VALE PÁJARO EN MANO QUE CIENTO VOLANDO",
+    "EN UN LUGAR DE LA MANCHA DE CUYO NOMBRE NO QUIERO ACORDARME",
+]
+GUESSES = "EAOSRNL"
+RENDERERS = ("containers", "canvas")
+
+
+# Switch a session to a renderer with the "Lienzo" switch, like a user would
+def use_renderer(session, renderer):
+    switch = find_controls(session.page, ft.Switch, lambda c: c.label == "Lienzo")[0]
+    switch.value = renderer == "canvas"
+    session.dispatch(switch.on_change, ft.ControlEvent(switch.uid, "change", str(switch.value).lower(),
+                                                       switch, session.page))
+
+
+# Number of controls in the panel that are on the client
+def panel_controls(session):
+    panel = session.page.controls[0].controls[-2]
+    return len(find_controls(panel.content, ft.Control, lambda c: c.uid is not None))
+
+
+def measure(renderer, phrase):
+    session = StubSession(f"renderer-{renderer}")
+    session.start("HOLA")  # Builds the guess controls
+    use_renderer(session, renderer)
+
+    payloads = defaultdict(list)
+    timings = defaultdict(list)
+
+    def timed(action, handler, *args):
+        bytes_before = session.connection.bytes_sent
+        start = time.perf_counter()
+        handler(*args)
+        timings[action].append(time.perf_counter() - start)
+        payloads[action].append(session.connection.bytes_sent - bytes_before)
+
+    timed("Comenzar", session.start, phrase)
+    controls = panel_controls(session)
+    for letter in GUESSES:
+        timed("Adivinar", session.guess, letter)
+        while session.has_pending:
+            timed("Siguiente", session.next)
+    timed("Resolver", session.solve)
+
+    return {
+        "controls": controls,
+        "controls_solved": panel_controls(session),
+        "actions": {
+            action: {
+                "count": len(values),
+                "mean_bytes": sum(values) / len(values),
+                "total_bytes": sum(values),
+                "mean_ms": sum(timings[action]) / len(timings[action]) * 1000,
+            }
+            for action, values in payloads.items()
+        },
+    }
+
+
+def run():
+    return {
+        phrase: {renderer: measure(renderer, phrase) for renderer in RENDERERS}
+        for phrase in PHRASES
+    }
+
+
+def print_report(results):
+    for phrase, by_renderer in results.items():
+        print(f"{phrase} ({len(phrase)} characters)")
+        print(f"{'':>12} {'controls':>9} {'solved':>7}  "
+              + " ".join(f"{action:>20}" for action in ("Comenzar", "Adivinar", "Siguiente", "Resolver")))
+        for renderer, result in by_renderer.items():
+            cells = []
+            for action in ("Comenzar", "Adivinar", "Siguiente", "Resolver"):
+                stats = result["actions"].get(action)
+                cells.append(f"{stats['mean_bytes']:>9.0f} B {stats['mean_ms']:>6.2f} ms" if stats else f"{'-':>20}")
+            print(f"{renderer:>12} {result['controls']:>9} {result['controls_solved']:>7}  " + " ".join(cells))
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the container and canvas panel renderers")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = run()
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
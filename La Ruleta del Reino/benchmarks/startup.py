@@ -0,0 +1,135 @@
+# Cold start benchmark: how long from launching Python to the first frame.
+#
+# Every run is a fresh interpreter (so nothing is cached in sys.modules) that
+# imports flet, imports the app, then runs main(page) against the local stub
+# client (see stub_page.py) until the first batch of controls is sent. Reports
+# separately:
+#   flet import    - import flet
+#   app import     - import main and the app's own modules, after flet
+#   first frame    - main(page) called -> first controls sent to the client
+#   main           - the whole main(page) call
+#   launch         - process launched -> first controls sent (includes the
+#                    interpreter start and both imports)
+#
+# Run from the project folder:
+#   python benchmarks/startup.py --runs 10
+#   python benchmarks/startup.py --runs 10 --json startup.json
+#
+# Only os, sys and time are imported at the top, so the child's import
+# timings are not helped by modules this script loads for itself.
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "src")
+
+
+# One cold start, in the child process; prints its timings as JSON
+def child():
+    start = time.perf_counter()
+    import flet as ft
+    flet_imported = time.perf_counter()
+
+    sys.path.insert(0, SRC)
+    import main as app
+    app_imported = time.perf_counter()
+
+    import asyncio
+    import json
+    sys.path.insert(0, HERE)
+    from flet.core.protocol import CommandEncoder
+    from flet.core.pubsub.pubsub_hub import PubSubHub
+    from stub_page import StubConnection
+
+    first_frame = {}
+    connection = StubConnection()
+    send = connection._send
+
+    def timed_send(message):
+        if not first_frame:
+            first_frame["perf"] = time.perf_counter()
+            first_frame["wall"] = time.time()
+            first_frame["bytes"] = len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")).encode())
+        send(message)
+
+    connection._send = timed_send
+    loop = asyncio.new_event_loop()
+    connection.pubsubhub = PubSubHub(loop)
+    page = ft.Page(connection, "startup", loop)
+    connection.page = page
+
+    main_start = time.perf_counter()
+    app.main(page)
+    main_done = time.perf_counter()
+
+    print(json.dumps({
+        "flet_import_ms": (flet_imported - start) * 1000,
+        "app_import_ms": (app_imported - flet_imported) * 1000,
+        "first_frame_ms": (first_frame["perf"] - main_start) * 1000,
+        "main_ms": (main_done - main_start) * 1000,
+        "first_frame_wall": first_frame["wall"],
+        "first_frame_bytes": first_frame["bytes"],
+        "bytes_sent": connection.bytes_sent,
+        "modules": len(sys.modules),
+    }))
+
+
+def run(runs):
+    import json
+    import statistics
+    import subprocess
+
+    samples = []
+    for _ in range(runs):
+        launched = time.time()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["launch_ms"] = (sample.pop("first_frame_wall") - launched) * 1000
+        samples.append(sample)
+
+    summary = {"runs": runs, "python": sys.version.split()[0]}
+    for key in ("flet_import_ms", "app_import_ms", "first_frame_ms", "main_ms", "launch_ms"):
+        values = [sample[key] for sample in samples]
+        summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    for key in ("first_frame_bytes", "bytes_sent", "modules"):
+        summary[key] = samples[-1][key]
+    return summary
+
+
+def print_report(summary):
+    print(f"{summary['runs']} cold starts, Python {summary['python']}")
+    print(f"{'':>14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for label, key in (("flet import", "flet_import_ms"), ("app import", "app_import_ms"),
+                       ("first frame", "first_frame_ms"), ("main", "main_ms"),
+                       ("launch", "launch_ms")):
+        timing = summary[key]
+        print(f"{label:>14} {timing['median']:>10.1f} {timing['min']:>8.1f} {timing['max']:>8.1f}")
+    print(f"first frame: {summary['first_frame_bytes']} bytes, "
+          f"{summary['bytes_sent']} bytes sent by main(), {summary['modules']} modules loaded")
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Measure import time and time to first frame")
+    parser.add_argument("--runs", type=int, default=10, help="cold starts to measure")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    summary = run(args.runs)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--child"]:
+        child()
+    else:
+        main()
@@ -0,0 +1,193 @@
+# Local stand-in for a Flet client: runs main(page) on a real ft.Page whose
+# connection answers locally, with no browser and no network.
+# Everything the app would send to the client is encoded as it would go over
+# the wire and counted, so handlers can be timed and payloads measured.
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import (
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+)
+from flet.core.pubsub.pubsub_hub import PubSubHub
+
+import main as app
+
+
+# Connection that processes commands like the Flet client would and keeps
+# count of the messages and bytes that would have been sent.
+# client_storage stands in for the browser's local storage.
+class StubConnection(LocalConnection):
+    def __init__(self, client_storage=None):
+        super().__init__()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.page = None
+        self.client_storage = {} if client_storage is None else client_storage
+
+    def send_command(self, session_id, command):
+        result, message = self._process_command(command)
+        if message:
+            self._send(message)
+        if command.name == "invokeMethod":
+            self._answer_method(*command.values, command.attrs)
+        return PageCommandResponsePayload(result=result, error="")
+
+    # Answer the client storage methods like the client would
+    def _answer_method(self, method_id, method_name, control_id, arguments):
+        key = arguments.get("key")
+        if method_name == "clientStorage:set":
+            self.client_storage[key] = arguments["value"]
+            result = "true"
+        elif method_name == "clientStorage:get":
+            value = self.client_storage.get(key)
+            result = None if value is None else json.dumps(value)
+        elif method_name == "clientStorage:remove":
+            result = "true" if self.client_storage.pop(key, None) is not None else "false"
+        elif method_name == "clientStorage:containskey":
+            result = "true" if key in self.client_storage else "false"
+        else:
+            return
+        data = json.dumps({"method_id": method_id, "result": result, "error": ""})
+        handler = self.page._get_event_handler("invoke_method_result")
+        handler(ft.ControlEvent("page", "invoke_method_result", data, self.page, self.page))
+
+    def send_commands(self, session_id, commands):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            self._send(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def _send(self, message):
+        payload = json.dumps(message, cls=CommandEncoder, separators=(",", ":"))
+        self.messages_sent += 1
+        self.bytes_sent += len(payload.encode())
+
+
+# Find every control under root of the given type that matches the predicate
+def find_controls(root, control_type, predicate=lambda control: True):
+    found = []
+    stack = [root]
+    while stack:
+        control = stack.pop()
+        if isinstance(control, control_type) and predicate(control):
+            found.append(control)
+        stack.extend(reversed(control._get_children()))
+    return found
+
+
+# One simulated user session: a page running main() plus shortcuts for the
+# actions a teacher takes (entering a phrase, guessing, "Siguiente", "Resolver").
+# Sessions that share a loop and a PubSubHub can talk to each other like
+# sessions of one server; sessions that share client_storage are like
+# sessions opened from the same browser.
+class StubSession:
+    def __init__(self, session_id, loop=None, pubsubhub=None, client_storage=None):
+        self.connection = StubConnection(client_storage)
+        self.loop = loop or asyncio.new_event_loop()
+        self.connection.pubsubhub = pubsubhub or PubSubHub(self.loop)
+        self.page = ft.Page(self.connection, session_id, self.loop)
+        self.connection.page = self.page
+        app.main(self.page)
+
+        self.phrase_input = find_controls(self.page, ft.TextField, lambda c: c.label)[0]
+        self.start_button = self._button("Comenzar")
+        self._guess_row = None
+        self.keyboard = False  # Whether keyboard mode is on (see use_keyboard)
+        self.settle()  # Tasks main() started, such as resuming a saved game
+
+    def _button(self, text):
+        return find_controls(self.page, ft.ElevatedButton, lambda c: c.text == text)[0]
+
+    # The guess controls are built with the first panel, so they are looked up then:
+    # the letter field, "Adivinar"/"Siguiente" and "Resolver", in this order
+    def _guess_controls(self):
+        if self._guess_row is None:
+            field = find_controls(self.page, ft.TextField, lambda c: c.max_length == 1)[0]
+            self._guess_row = (field, *field.parent.parent.controls[1:3])
+        return self._guess_row
+
+    @property
+    def guess_field(self):
+        return self._guess_controls()[0]
+
+    @property
+    def guess_button(self):
+        return self._guess_controls()[1]
+
+    @property
+    def solve_button(self):
+        return self._guess_controls()[2]
+
+    # Run an event handler; async handlers run to completion on the session loop
+    def dispatch(self, handler, event):
+        result = handler(event)
+        if asyncio.iscoroutine(result):
+            self.loop.run_until_complete(result)
+
+    # Send a click event to a control, as the Flet server would
+    def click(self, control):
+        self.dispatch(control.on_click, ft.ControlEvent(control.uid, "click", "", control, self.page))
+
+    def start(self, phrase):
+        self.phrase_input.value = phrase
+        self.click(self.start_button)
+
+    def guess(self, letter):
+        self.guess_field.value = letter
+        self.click(self.guess_button)
+
+    # Whether the guess button is in "Siguiente" mode
+    @property
+    def has_pending(self):
+        return self.guess_button.text == "Siguiente"
+
+    def next(self):
+        self.click(self.guess_button)
+
+    def solve(self):
+        self.click(self.solve_button)
+
+    # Resize the window; the client reports the new page size before the event
+    def resize(self, width, height=800):
+        self.page._set_attr("width", width, dirty=False)
+        self.page._set_attr("height", height, dirty=False)
+        self.dispatch(self.page.on_resize, ft.WindowResizeEvent(ft.ControlEvent(
+            "page", "resized", json.dumps({"width": width, "height": height}), self.page, self.page
+        )))
+
+    # Turn on keyboard mode with its switch (needs the guess controls, so a panel first)
+    def use_keyboard(self, on=True):
+        switch = find_controls(self.page, ft.Switch, lambda c: c.label == "Teclado")[0]
+        switch.value = self.keyboard = on
+        self.dispatch(switch.on_change, ft.ControlEvent(switch.uid, "change", str(on).lower(), switch, self.page))
+
+    def key(self, key, shift=False, ctrl=False):
+        self.dispatch(self.page.on_keyboard_event,
+                      ft.KeyboardEvent(key=key, shift=shift, ctrl=ctrl, alt=False, meta=False))
+
+    # Run the handlers other sessions scheduled on the loop (pubsub messages),
+    # then wait up to timeout seconds for tasks still waiting on a thread (the
+    # snapshot file store reads and writes on one)
+    def settle(self, rounds=3, timeout=0.2):
+        for _ in range(rounds):
+            self.loop.run_until_complete(asyncio.sleep(0))
+        pending = asyncio.all_tasks(self.loop)
+        if pending:
+            self.loop.run_until_complete(asyncio.wait(pending, timeout=timeout))
@@ -0,0 +1,174 @@
+# Wheel spins under load: many sessions spinning at once on one event loop.
+#
+# Opens N sessions on a shared loop (like sessions of one server), spins the
+# wheel on all of them and, while they spin, keeps guessing letters on other
+# sessions. Reports, as the client would see it:
+#   frames        - frames received per spin and the bytes of each
+#   interval      - time between two frames of a spin (16.7 ms at 60 fps);
+#                   a gap over 1.5 frames counts as dropped frames
+#   guess         - latency of the guesses made during the spins
+#   loop lag      - how late a 5 ms timer fires, i.e. how long other work
+#                   waits for the event loop
+#
+# Run from the project folder:
+#   python benchmarks/wheel.py --sessions 20
+#   python benchmarks/wheel.py --sessions 100 --json wheel.json
+import argparse
+import asyncio
+import json
+import math
+import time
+
+import flet as ft
+
+from stub_page import StubSession, find_controls
+
+FRAME = 1 / 60
+PHRASE = "MÁS VALE PÁJARO EN MANO QUE CIENTO VOLANDO"
+GUESSES = "EAOSRNL"
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+# Record when each message of a session is sent, with its size
+def record_frames(session):
+    sent = []
+    send = session.connection._send
+
+    def timed_send(message):
+        before = session.connection.bytes_sent
+        send(message)
+        sent.append((time.perf_counter(), session.connection.bytes_sent - before))
+
+    session.connection._send = timed_send
+    return sent
+
+
+async def click(session, control):
+    await control.on_click(ft.ControlEvent(control.uid, "click", "", control, session.page))
+
+
+def run(sessions_count, guessers):
+    loop = asyncio.new_event_loop()
+    sessions = [StubSession(f"wheel-{n}", loop=loop) for n in range(sessions_count + guessers)]
+    for session in sessions:
+        session.start(PHRASE)
+    spinners = sessions[:sessions_count]
+    others = sessions[sessions_count:]
+    spin_buttons = [
+        find_controls(session.page, ft.IconButton, lambda c: c.tooltip == "Girar la ruleta")[0]
+        for session in spinners
+    ]
+
+    async def main():
+        # The first spin builds the wheel; the next ones are measured
+        for session, button in zip(spinners, spin_buttons):
+            await click(session, button)
+        await asyncio.sleep(0)
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+        await asyncio.sleep(0)
+
+        sent = [record_frames(session) for session in spinners]
+        for session, button in zip(spinners, spin_buttons):
+            await click(session, button)
+        spins = asyncio.all_tasks() - {asyncio.current_task()}
+
+        spinning = True
+        lags = []
+        guess_times = []
+
+        async def probe():
+            while spinning:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - start - 0.005)
+
+        async def guess():
+            number = 0
+            while spinning:
+                for session in others:
+                    session.guess_field.value = GUESSES[number % len(GUESSES)]
+                    start = time.perf_counter()
+                    await click(session, session.guess_button)
+                    guess_times.append(time.perf_counter() - start)
+                number += 1
+                await asyncio.sleep(0.05)
+
+        helpers = [loop.create_task(probe())]
+        if others:
+            helpers.append(loop.create_task(guess()))
+        start = time.perf_counter()
+        await asyncio.wait(spins)
+        elapsed = time.perf_counter() - start
+        spinning = False
+        await asyncio.gather(*helpers)
+        return sent, lags, guess_times, elapsed
+
+    sent, lags, guess_times, elapsed = loop.run_until_complete(main())
+
+    intervals = []
+    dropped = 0
+    frame_bytes = []
+    for frames in sent:
+        # The last message carries the result of the spin, not a frame
+        frames = frames[:-1]
+        frame_bytes.extend(size for _, size in frames)
+        for (earlier, _), (later, _) in zip(frames, frames[1:]):
+            interval = later - earlier
+            intervals.append(interval)
+            if interval > 1.5 * FRAME:
+                dropped += round(interval / FRAME) - 1
+    frames_count = sum(len(frames) - 1 for frames in sent)
+    return {
+        "sessions": sessions_count,
+        "guessers": guessers,
+        "spin_s": elapsed,
+        "frames_per_spin": frames_count / sessions_count,
+        "bytes_per_frame": sum(frame_bytes) / len(frame_bytes) if frame_bytes else 0,
+        "dropped_frames": dropped,
+        "dropped_share": dropped / (frames_count + dropped) if frames_count else 0.0,
+        "interval_p50_ms": percentile(intervals, 50) * 1000,
+        "interval_p99_ms": percentile(intervals, 99) * 1000,
+        "guesses": len(guess_times),
+        "guess_p50_ms": percentile(guess_times, 50) * 1000,
+        "guess_p99_ms": percentile(guess_times, 99) * 1000,
+        "loop_lag_p50_ms": percentile(lags, 50) * 1000,
+        "loop_lag_p99_ms": percentile(lags, 99) * 1000,
+        "loop_lag_max_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def print_report(result):
+    print(f"{result['sessions']} sessions spinning, {result['guessers']} guessing, "
+          f"spins took {result['spin_s']:.1f}s")
+    print(f"frames: {result['frames_per_spin']:.0f} per spin, {result['bytes_per_frame']:.0f} bytes each, "
+          f"{result['dropped_frames']} dropped ({result['dropped_share']:.1%})")
+    print(f"frame interval: p50 {result['interval_p50_ms']:.1f} ms, p99 {result['interval_p99_ms']:.1f} ms")
+    print(f"guesses during spins: {result['guesses']}, p50 {result['guess_p50_ms']:.2f} ms, "
+          f"p99 {result['guess_p99_ms']:.2f} ms")
+    print(f"loop lag: p50 {result['loop_lag_p50_ms']:.2f} ms, p99 {result['loop_lag_p99_ms']:.2f} ms, "
+          f"max {result['loop_lag_max_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure wheel frames with many sessions spinning")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions spinning at once")
+    parser.add_argument("--guessers", type=int, default=5, help="sessions guessing letters meanwhile")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    result = run(args.sessions, args.guessers)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Batches of work on a process pool, for the offline tools (difficulty.py,
+# panel_export.py).
+#
+# Entries are cut into batches and each batch is one task. Only a few batches
+# per worker are in flight at a time and results come back in input order,
+# so inputs of any size are streamed through.
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+def batches(entries, size):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, size))
+        if not batch:
+            return
+        yield batch
+
+
+# Call function(batch, *args) for batches of entries on a process pool and
+# yield the items of every result, in input order. initializer(*initargs)
+# runs once per worker. With one worker everything runs in this process.
+def map_batches(function, entries, batch_size, args=(), workers=None, initializer=None, initargs=()):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        if initializer:
+            initializer(*initargs)
+        for batch in batches(entries, batch_size):
+            yield from function(batch, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = []
+        for batch in batches(entries, batch_size):
+            pending.append(executor.submit(function, batch, *args))
+            if len(pending) >= 2 * workers:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
@@ -0,0 +1,95 @@
+# Presenter/spectator mode: one host session (the teacher) drives a panel that
+# other sessions (the students) mirror.
+#
+# The host publishes its game actions as small delta events on a room topic
+# of page.pubsub. Spectators apply them to their own cells, so the work per
+# event grows with the number of cells that changed, not with the panel size.
+# Events are tuples:
+#   (PANEL, phrase)                      a new panel
+#   (PENDING_CELLS, indices)             cells highlighted by a guess
+#   (REVEALED_CELLS, indices)            cells revealed ("Siguiente", automatic reveal, "Resolver")
+#   (RESET,)                             the host took the panel off ("Nueva frase")
+#   (SYNC, phrase, states, pending)      full state, only for a spectator that just joined
+#   (HELLO, session_id)                  a spectator joined and asks for SYNC
+
+PANEL = "panel"
+PENDING_CELLS = "pending"
+REVEALED_CELLS = "revealed"
+RESET = "reset"
+SYNC = "sync"
+HELLO = "hello"
+
+
+def room_topic(room):
+    return f"ruleta/{room}"
+
+
+# Topic only one spectator listens to, for its SYNC
+def spectator_topic(room, session_id):
+    return f"ruleta/{room}/{session_id}"
+
+
+# Host side. get_state() returns the current PanelState (or None) so late
+# joiners can be sent the panel as it is now.
+class Presenter:
+    def __init__(self, pubsub, room, get_state):
+        self.pubsub = pubsub
+        self.room = room
+        self.topic = room_topic(room)
+        self.get_state = get_state
+        self.events_sent = 0
+        pubsub.subscribe_topic(self.topic, self._on_message)
+
+    async def _on_message(self, topic, message):
+        if message[0] != HELLO:
+            return
+        state = self.get_state()
+        if state is None:
+            return
+        self.pubsub.send_all_on_topic(
+            spectator_topic(self.room, message[1]),
+            (SYNC, state.phrase, bytes(state.states), tuple(state.pending)),
+        )
+
+    def _send(self, event):
+        self.events_sent += 1
+        self.pubsub.send_others_on_topic(self.topic, event)
+
+    def panel(self, phrase):
+        self._send((PANEL, phrase))
+
+    def pending(self, indices):
+        if indices:
+            self._send((PENDING_CELLS, tuple(indices)))
+
+    def revealed(self, indices):
+        if indices:
+            self._send((REVEALED_CELLS, tuple(indices)))
+
+    def reset(self):
+        self._send((RESET,))
+
+    def close(self):
+        self.pubsub.unsubscribe_topic(self.topic)
+
+
+# Spectator side. handler(event) is an async function called with every
+# event from the host (HELLO messages of other spectators are filtered out).
+class Spectator:
+    def __init__(self, pubsub, room, session_id, handler):
+        self.pubsub = pubsub
+        self.room = room
+        self.topics = (room_topic(room), spectator_topic(room, session_id))
+        self.handler = handler
+        for topic in self.topics:
+            pubsub.subscribe_topic(topic, self._on_message)
+        # Ask the host for the panel as it is now
+        pubsub.send_others_on_topic(self.topics[0], (HELLO, session_id))
+
+    async def _on_message(self, topic, message):
+        if message[0] != HELLO:
+            await self.handler(message)
+
+    def close(self):
+        for topic in self.topics:
+            self.pubsub.unsubscribe_topic(topic)
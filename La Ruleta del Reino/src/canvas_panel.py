@@ -0,0 +1,94 @@
+import flet as ft
+import flet.canvas as cv
+
+from cells import CELL_BORDER, NORMAL_SHADOW, NORMAL_STYLE, PENDING_SHADOW, PENDING_STYLE
+from panel_state import PENDING, REVEALED, SPECIAL, cell_boxes
+
+FACE_PAINT = ft.Paint(color=NORMAL_STYLE.bgcolor, style=ft.PaintingStyle.FILL)
+PENDING_PAINT = ft.Paint(color=PENDING_STYLE.bgcolor, style=ft.PaintingStyle.FILL)
+GLOW_PAINT = ft.Paint(
+    color=PENDING_SHADOW.color,
+    style=ft.PaintingStyle.FILL,
+    blur_image=PENDING_SHADOW.blur_radius,
+)
+BORDER_PAINT = ft.Paint(
+    color=CELL_BORDER.top.color,
+    stroke_width=CELL_BORDER.top.width,
+    style=ft.PaintingStyle.STROKE,
+)
+
+
+# Draws the whole panel on one canvas instead of a Container and Text per
+# cell. The cells that never change (faces, borders, shadow) are one path
+# each; a pending cell adds a glow and a yellow rectangle, a shown letter
+# adds a text, so a guess or reveal only sends the shapes it adds or removes.
+class CanvasPanel:
+    def __init__(self):
+        self.shadow = cv.Shadow(color=NORMAL_SHADOW.color, elevation=NORMAL_SHADOW.blur_radius)
+        self.faces = cv.Path(paint=FACE_PAINT)
+        self.borders = cv.Path(paint=BORDER_PAINT)
+        self.canvas = cv.Canvas(shapes=[self.shadow, self.faces, self.borders])
+        self.boxes = []    # (x, y) of each cell, None for spaces
+        self.pending = {}  # Cell index -> (glow, fill) shapes
+        self.letters = {}  # Cell index -> text shape
+        self.letter_width = 40
+
+    # Draw a panel from scratch for its rows (see panel_state.layout_rows)
+    def draw(self, state, rows, letter_width):
+        self.letter_width = letter_width
+        self.canvas.width, self.canvas.height, self.boxes = cell_boxes(state.states, rows, letter_width)
+
+        rects = [self._rect(index) for index, box in enumerate(self.boxes) if box]
+        self.shadow.path = rects
+        self.faces.elements = rects
+        self.borders.elements = rects
+
+        self.pending = {}
+        self.letters = {}
+        self.canvas.shapes = [self.shadow, self.faces, self.borders]
+        self.update_cells(state, range(len(state)))
+
+    def _rect(self, index, grow=0):
+        x, y = self.boxes[index]
+        return cv.Path.Rect(
+            x - grow, y - grow,
+            self.letter_width + 2 * grow, self.letter_width * 1.5 + 2 * grow,
+            border_radius=NORMAL_STYLE.border_radius,
+        )
+
+    # Show the current state of some cells. Returns the controls to update.
+    def update_cells(self, state, indices):
+        shapes = self.canvas.shapes
+        changed = False
+        for index in indices:
+            cell_state = state.states[index]
+            if cell_state == PENDING and index not in self.pending:
+                # Pending cells go under the borders, like the container's border over its color
+                glow = cv.Path([self._rect(index, grow=1)], paint=GLOW_PAINT)
+                fill = cv.Path([self._rect(index)], paint=PENDING_PAINT)
+                position = shapes.index(self.borders)
+                shapes[position:position] = [glow, fill]
+                self.pending[index] = (glow, fill)
+                changed = True
+            elif cell_state != PENDING and index in self.pending:
+                for shape in self.pending.pop(index):
+                    shapes.remove(shape)
+                changed = True
+
+            if (cell_state == REVEALED or cell_state == SPECIAL) and index not in self.letters:
+                x, y = self.boxes[index]
+                text = cv.Text(
+                    x + self.letter_width / 2,
+                    y + self.letter_width * 0.75,
+                    state.phrase[index],
+                    style=ft.TextStyle(
+                        size=int(self.letter_width * 0.6),
+                        weight=ft.FontWeight.BOLD,
+                        color=ft.Colors.BLACK,
+                    ),
+                    alignment=ft.alignment.center,
+                )
+                shapes.append(text)
+                self.letters[index] = text
+                changed = True
+        return [self.canvas] if changed else []
@@ -0,0 +1,111 @@
+from typing import NamedTuple, Optional
+
+import flet as ft
+
+from panel_state import HIDDEN, PENDING, REVEALED, SPACE, SPECIAL
+
+
+# Look of a panel cell in one state
+class CellStyle(NamedTuple):
+    bgcolor: str
+    border: Optional[ft.Border]
+    border_radius: Optional[int]
+    shadow: Optional[ft.BoxShadow]
+
+
+# Shared style objects. They are never mutated, so every cell in the same
+# state points at the same instances instead of allocating its own.
+CELL_BORDER = ft.border.all(2, ft.Colors.BLUE_800)
+
+NORMAL_SHADOW = ft.BoxShadow(
+    spread_radius=1,
+    blur_radius=4,
+    color=ft.Colors.BLUE_GREY_300,
+    offset=ft.Offset(2, 2)
+)
+
+# Gentle yellow glow for letters waiting to be revealed
+PENDING_SHADOW = ft.BoxShadow(
+    spread_radius=1,
+    blur_radius=6,
+    color="#FFD54F80",  # Yellow with opacity
+    offset=ft.Offset(0, 0)
+)
+
+NORMAL_STYLE = CellStyle(ft.Colors.WHITE, CELL_BORDER, 5, NORMAL_SHADOW)
+PENDING_STYLE = CellStyle("#FFF176", CELL_BORDER, 5, PENDING_SHADOW)  # Light yellow
+REVEALED_STYLE = NORMAL_STYLE  # Revealed letters go back to the original look
+SPACE_STYLE = CellStyle(ft.Colors.TRANSPARENT, None, None, None)
+
+# Style for each PanelState cell state
+CELL_STYLES = {
+    HIDDEN: NORMAL_STYLE,
+    PENDING: PENDING_STYLE,
+    REVEALED: REVEALED_STYLE,
+    SPACE: SPACE_STYLE,
+    SPECIAL: NORMAL_STYLE,
+}
+
+
+# Apply the style and text for a cell state; the letter is only shown once
+# revealed (special characters are shown from the start)
+def style_cell(cell, state, char):
+    style = CELL_STYLES[state]
+    cell.bgcolor = style.bgcolor
+    cell.border = style.border
+    cell.border_radius = style.border_radius
+    cell.shadow = style.shadow
+    cell.content.value = char if state == REVEALED or state == SPECIAL else ""
+
+
+# Set the size of a cell and its letter for the current letter width
+def size_cell(cell, letter_width):
+    cell.width = letter_width
+    cell.height = letter_width * 1.5
+    cell.content.size = int(letter_width * 0.6)
+
+
+# Create an empty cell container (styled later with style_cell)
+def new_cell(letter_width):
+    cell = ft.Container(
+        margin=2,
+        alignment=ft.alignment.center,
+        content=ft.Text(
+            value="",
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.BLACK,
+        ),
+    )
+    size_cell(cell, letter_width)
+    return cell
+
+
+# Pool of cell containers recycled between phrases and re-layouts
+class CellPool:
+    def __init__(self):
+        self.free = []
+        self.created = 0  # Number of cells ever allocated by this pool
+
+    # Take a cell from the pool, creating one only if the pool is empty
+    def acquire(self, letter_width):
+        if self.free:
+            cell = self.free.pop()
+            size_cell(cell, letter_width)
+            return cell
+        self.created += 1
+        return new_cell(letter_width)
+
+    # Return cells to the pool
+    def release(self, cells):
+        self.free.extend(cells)
+
+    # Resize a list of cells to count cells, keeping the existing ones in
+    # order (so they stay in their rows) and recycling any surplus. The kept
+    # cells are sized too, as the letter width may have changed since they were placed.
+    def recycle(self, cells, count, letter_width):
+        if len(cells) > count:
+            self.release(cells[count:])
+            cells = cells[:count]
+        for cell in cells:
+            size_cell(cell, letter_width)
+        return cells + [self.acquire(letter_width) for _ in range(count - len(cells))]
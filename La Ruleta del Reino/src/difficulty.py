@@ -0,0 +1,147 @@
+# Difficulty scores for phrase libraries, computed in parallel before class.
+#
+# Phrases are streamed from the same JSON, CSV and text files as phrase_bank.py
+# and scored in batches on a process pool. Each phrase gets a score from 0
+# (easy) to 100 (hard) from these signals:
+#   coverage  - share of its letters among the most common Spanish letters,
+#               the ones revealed by the first guesses
+#   vowels    - share of vowels, which are cheap to reveal
+#   distinct  - number of different letters left to guess
+#   rows      - panel rows at the desktop layout (panel_state.layout_rows)
+#   shown     - punctuation cells, shown from the start of the round
+# The result is a scored phrase bank index (difficulty levels included) that
+# the app opens at startup, and optionally a CSV ranking. The workers also
+# lay out each phrase at every index width and build its letter mask, so the
+# parent process only writes the index.
+#
+#   python src/difficulty.py frases.csv refranes.txt -o src/assets/frases.rrpb
+#   python src/difficulty.py frases.csv -o src/assets/frases.rrpb --ranking ranking.csv --workers 8
+import unicodedata
+from collections import Counter
+
+from batch_pool import map_batches
+from panel_state import ALPHABET, LETTER_BITS, layout_rows, normalize_letter
+from phrase_bank import DIFFICULTY_LEVELS, LAYOUT_WIDTHS, build_index, difficulty_level, read_phrases
+
+BATCH_SIZE = 1000
+
+# The most frequent letters in Spanish text, usually the first ones guessed
+COMMON_LETTERS = set("EAOSRNID")
+VOWELS = set("AEIOU")
+LETTER_SET = set(ALPHABET)
+
+# How much each signal (0 = easy, 1 = hard) weighs in the score
+WEIGHTS = {
+    "coverage": 0.40,
+    "vowels": 0.20,
+    "distinct": 0.20,
+    "rows": 0.10,
+    "shown": 0.10,
+}
+
+
+# Translation table from upper-case letters to their normalized form, so a
+# phrase is normalized with one str.translate() call instead of one
+# unicodedata.normalize() per character. Covers the Latin letters up to U+024F.
+def _normalize_table():
+    table = {}
+    for code in range(0x00C0, 0x0250):
+        char = chr(code)
+        if not unicodedata.category(char).startswith("L"):
+            continue
+        normalized = normalize_letter(char.upper())
+        if normalized != char:
+            table[code] = normalized
+    return table
+
+
+NORMALIZE_TABLE = _normalize_table()
+
+
+DESKTOP_WIDTH = LAYOUT_WIDTHS.index(12)
+
+
+# Score of one phrase, its signals (each from 0 = easy to 1 = hard) and its
+# phrase_bank.phrase_layout() for the index
+def score_phrase(phrase):
+    phrase = " ".join(phrase.upper().split())
+    letters = Counter(phrase.translate(NORMALIZE_TABLE))
+    mask = 0
+    for letter in letters:
+        mask |= LETTER_BITS.get(letter, 0)
+    layout = (mask, tuple(len(layout_rows(phrase, width)) for width in LAYOUT_WIDTHS))
+    letter_cells = sum(count for letter, count in letters.items() if letter in LETTER_SET)
+    shown = sum(count for char, count in letters.items() if not char.isalnum() and char != " ")
+    if not letter_cells:
+        return 0.0, {}, layout
+
+    common = sum(letters[letter] for letter in COMMON_LETTERS)
+    vowels = sum(letters[letter] for letter in VOWELS)
+    distinct = sum(1 for letter in letters if letter in LETTER_SET)
+    rows = layout[1][DESKTOP_WIDTH]
+    signals = {
+        "coverage": 1 - common / letter_cells,
+        "vowels": 1 - min(vowels / letter_cells / 0.5, 1),
+        "distinct": min(distinct / 20, 1),
+        "rows": min((rows - 1) / 3, 1),
+        "shown": 1 - min(shown / 3, 1),
+    }
+    score = 100 * sum(WEIGHTS[name] * value for name, value in signals.items())
+    return score, signals, layout
+
+
+# Score a batch of (phrase, category) pairs in a worker process
+def score_batch(batch):
+    return [(phrase, category, *score_phrase(phrase)) for phrase, category in batch]
+
+
+# Score (phrase, category) pairs on a process pool, yielding (phrase,
+# category, score, signals, layout) in input order. Only a few batches per worker are
+# in flight, so sources of any size are streamed through.
+def score_entries(entries, workers=None, batch_size=BATCH_SIZE):
+    return map_batches(score_batch, entries, batch_size, workers=workers)
+
+
+def write_ranking(scored, path):
+    import csv
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["frase", "categoria", "dificultad", "nivel", *WEIGHTS])
+        for phrase, category, score, signals, _ in sorted(scored, key=lambda entry: -entry[2]):
+            writer.writerow([phrase, category, round(score), difficulty_level(round(score)),
+                             *(round(signals.get(name, 0.0), 3) for name in WEIGHTS)])
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Score phrases by difficulty and build a scored phrase bank")
+    parser.add_argument("sources", nargs="+", help="JSON, CSV or text files with phrases")
+    parser.add_argument("-o", "--output", required=True, help="phrase bank index to write")
+    parser.add_argument("--ranking", help="also write the phrases sorted by difficulty to this CSV file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="phrases per task")
+    args = parser.parse_args()
+
+    def entries():
+        for source in args.sources:
+            yield from read_phrases(source)
+
+    start = time.perf_counter()
+    scored = list(score_entries(entries(), args.workers, args.batch_size))
+    elapsed = time.perf_counter() - start
+    count = build_index(
+        ((phrase, category, score, layout) for phrase, category, score, _, layout in scored), args.output
+    )
+    if args.ranking:
+        write_ranking(scored, args.ranking)
+
+    levels = Counter(difficulty_level(round(score)) for _, _, score, _, _ in scored)
+    print(f"{count} phrases scored in {elapsed:.2f}s -> {args.output}")
+    print(", ".join(f"{level}: {levels[level]}" for level in DIFFICULTY_LEVELS))
+
+
+if __name__ == "__main__":
+    main()
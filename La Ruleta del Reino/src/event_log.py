@@ -0,0 +1,237 @@
+# Append-only log of the game actions, for classroom analytics (which letters
+# are guessed first, how long rounds take).
+#
+# Turn it on with RULETA_EVENT_LOG=path. All sessions of the server append to
+# the same file, which starts with MAGIC and then holds one record per event
+# (little-endian):
+#   size      H byte length of the rest of the record
+#   kind      B one of the event kinds below
+#   time      d seconds since the epoch
+#   session   I session number, declared by a SESSION event. Numbers start
+#             again from 0 when the server restarts, so a SESSION event
+#             starts a new session even if its number was used before.
+#   data      depends on the kind:
+#               SESSION  UTF-8 session id
+#               PANEL    UTF-8 phrase
+#               GUESS    H cells matched + UTF-8 letter
+#               REVEAL   H cell index
+#               SOLVE    H cells revealed
+# Handlers only encode the record and put it on a queue; a writer thread
+# appends the records through a buffered file, so a slow disk never holds up
+# a handler. Records are read back one at a time with read_events(), in
+# blocks, so logs of any size are replayed without loading them whole.
+#
+#   python src/event_log.py eventos.rrlog
+import atexit
+import itertools
+import os
+import queue
+import struct
+import threading
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+MAGIC = b"RREL0001"
+
+SESSION = 0
+PANEL = 1
+GUESS = 2
+REVEAL = 3
+SOLVE = 4
+KIND_NAMES = ("session", "panel", "guess", "reveal", "solve")
+
+RECORD_HEADER = struct.Struct("<HBdI")
+WRITE_BUFFER = 64 * 1024
+FLUSH_INTERVAL = 1.0  # Seconds a record may wait in the buffer
+READ_BLOCK = 1024 * 1024
+
+Event = namedtuple("Event", "kind time session data")
+
+
+# Writer of one log file, shared by the sessions of the process
+class EventLog:
+    def __init__(self, path):
+        self.path = path
+        self.written = 0  # Records written to the file
+        self._queue = queue.SimpleQueue()
+        self._sessions = itertools.count()
+        with open(path, "ab+") as f:
+            if f.tell() == 0:
+                f.write(MAGIC)
+            else:
+                f.seek(0)
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} is not an event log")
+        self._thread = threading.Thread(target=self._write, name="event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Declare a session and return the number its events are logged with
+    def session(self, session_id):
+        number = next(self._sessions)
+        self.log(number, SESSION, session_id.encode("utf-8"))
+        return number
+
+    # Queue one event; never waits for the file
+    def log(self, session, kind, data=b""):
+        self._queue.put(RECORD_HEADER.pack(RECORD_HEADER.size - 2 + len(data), kind, time.time(), session) + data)
+
+    def panel(self, session, phrase):
+        self.log(session, PANEL, phrase.encode("utf-8"))
+
+    def guess(self, session, letter, matches):
+        self.log(session, GUESS, struct.pack("<H", matches) + letter.encode("utf-8"))
+
+    def reveal(self, session, index):
+        self.log(session, REVEAL, struct.pack("<H", index))
+
+    def solve(self, session, revealed):
+        self.log(session, SOLVE, struct.pack("<H", revealed))
+
+    # Writer thread: append queued records, flushing at most FLUSH_INTERVAL
+    # after a record was written, even while more keep coming; None stops it
+    def _write(self):
+        with open(self.path, "ab", buffering=WRITE_BUFFER) as f:
+            flush_due = None  # When the oldest unflushed record must be on disk
+            while True:
+                timeout = None if flush_due is None else max(0.0, flush_due - time.monotonic())
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    record = False
+                if record is None:
+                    return
+                if record:
+                    f.write(record)
+                    self.written += 1
+                    if flush_due is None:
+                        flush_due = time.monotonic() + FLUSH_INTERVAL
+                if flush_due is not None and time.monotonic() >= flush_due:
+                    f.flush()
+                    flush_due = None
+
+    # Write what is queued and stop the writer thread
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+# Events of a log file, one at a time. Raises ValueError if it is not a log;
+# a record cut short at the end (the server stopped while writing) is ignored.
+def read_events(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an event log")
+        # Bound to locals, this loop runs once per event
+        unpack_header = RECORD_HEADER.unpack_from
+        header_size = RECORD_HEADER.size
+        decoders = DECODERS
+        new_event = Event._make
+
+        buffer = b""  # Start of a record that continues in the next block
+        while True:
+            block = f.read(READ_BLOCK)
+            if not block:
+                return
+            buffer = buffer + block if buffer else block
+            offset = 0
+            end = len(buffer)
+            while offset + header_size <= end:
+                size, kind, when, session = unpack_header(buffer, offset)
+                record_end = offset + 2 + size
+                if record_end > end:
+                    break
+                yield new_event((kind, when, session, decoders[kind](buffer[offset + header_size:record_end])))
+                offset = record_end
+            buffer = buffer[offset:]
+
+
+def _decode_text(data):
+    return data.decode("utf-8")
+
+
+def _decode_guess(data):
+    return data[2:].decode("utf-8"), data[0] | data[1] << 8
+
+
+def _decode_number(data):
+    return data[0] | data[1] << 8
+
+
+# Data of an event by kind: session id or phrase (str), (letter, matches), a cell index or a count
+DECODERS = (_decode_text, _decode_text, _decode_guess, _decode_number, _decode_number)
+
+
+# Aggregate a stream of events: events per kind, the letters guessed first
+# in a round, how often each letter is guessed and how long rounds take (from
+# the panel to "Resolver" or the next panel of the session)
+def summarize(events):
+    kinds = [0] * len(KIND_NAMES)
+    first_guesses = Counter()
+    guesses = Counter()
+    round_start = {}  # Session -> (time the round started, no guess yet)
+    durations = []
+    for kind, when, session, data in events:
+        kinds[kind] += 1
+        if kind == SESSION:
+            # A new session, maybe with the number of one from before a restart
+            round_start.pop(session, None)
+        elif kind == PANEL:
+            if session in round_start:
+                durations.append(when - round_start[session][0])
+            round_start[session] = (when, True)
+        elif kind == GUESS and session in round_start:
+            letter = data[0]
+            guesses[letter] += 1
+            start, first = round_start[session]
+            if first:
+                first_guesses[letter] += 1
+                round_start[session] = (start, False)
+        elif kind == SOLVE and session in round_start:
+            durations.append(when - round_start.pop(session)[0])
+    durations.sort()
+    return {
+        "events": sum(kinds),
+        "kinds": dict(zip(KIND_NAMES, kinds)),
+        "first_guesses": first_guesses.most_common(),
+        "guesses": guesses.most_common(),
+        "rounds": len(durations),
+        "median_round_s": durations[len(durations) // 2] if durations else 0.0,
+    }
+
+
+# Open a log once per process; sessions share the same writer.
+# Returns None when no path is set.
+@lru_cache(maxsize=4)
+def open_event_log(path):
+    if not path:
+        return None
+    return EventLog(path)
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Summarize a game event log")
+    parser.add_argument("log", help="event log written with RULETA_EVENT_LOG")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = summarize(read_events(args.log))
+    elapsed = time.perf_counter() - start
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+    print(f"{summary['events']} events in {elapsed:.2f}s ({os.path.getsize(args.log)} bytes)")
+    print(", ".join(f"{kind}: {count}" for kind, count in summary["kinds"].items()))
+    print(f"{summary['rounds']} rounds, median {summary['median_round_s']:.1f}s")
+    print("first guesses: " + ", ".join(f"{letter} {count}" for letter, count in summary["first_guesses"][:10]))
+    print("all guesses:   " + ", ".join(f"{letter} {count}" for letter, count in summary["guesses"][:10]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Binary index files (phrase_bank.py, word_index.py), memory-mapped when read.
+#
+# A file is MAGIC, the byte length of a JSON header (I, little-endian), the
+# header, then the sections, each aligned to 8 bytes so arrays can be cast
+# straight from the mapping. The header's "sections" maps every section to
+# [offset after the header, byte length, array typecode].
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+# Little-endian bytes of an array, as stored in the index
+def array_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# Write an index file from its header (a dict) and sections (name -> bytes or
+# array); the file is replaced once it is complete
+def write_index(path, magic, header, sections):
+    layout = {}
+    blobs = []
+    offset = 0
+    for name, values in sections.items():
+        blob = values if isinstance(values, bytes) else array_bytes(values)
+        typecode = "B" if isinstance(values, bytes) else values.typecode
+        layout[name] = [offset, len(blob), typecode]
+        padding = -len(blob) % 8
+        blobs.append(blob + b"\0" * padding)
+        offset += len(blob) + padding
+
+    header = json.dumps({**header, "sections": layout}).encode("utf-8")
+    header += b" " * (-(len(magic) + 4 + len(header)) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+# Map an index file: returns the mapping, its header and where the sections
+# start. Raises ValueError if the file does not start with magic.
+def open_index(path, magic, description):
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(magic)] != magic:
+        mapping.close()
+        raise ValueError(f"{path} is not a {description}")
+    (header_size,) = struct.unpack_from("<I", mapping, len(magic))
+    start = len(magic) + 4
+    header = json.loads(bytes(mapping[start:start + header_size]))
+    return mapping, header, start + header_size
+
+
+# View of a section: bytes as a memoryview, other typecodes as an array view
+# of the mapping (a copy on big-endian machines)
+def section_view(mapping, data_start, offset, size, typecode="B"):
+    view = memoryview(mapping)[data_start + offset:data_start + offset + size]
+    if typecode == "B":
+        return view
+    if sys.byteorder == "big":
+        swapped = array(typecode, bytes(view))
+        swapped.byteswap()
+        return swapped
+    return view.cast(typecode)
@@ -0,0 +1,208 @@
+# Opt-in instrumentation of the app's handlers.
+#
+# Turn it on with RULETA_INSTRUMENT=1 or by running main.py with --instrument.
+# Every instrumented handler call records its wall time, the number of
+# controls it touched and the number of page.update() calls it made. The last
+# ROLLING_WINDOW calls of each handler are kept for rolling histograms, shown
+# in a hidden overlay (Ctrl+Shift+D) and written as JSON.
+#
+# RULETA_CPROFILE=path also writes a cProfile file of the handlers of the
+# first session that starts (one session only, so the profile is readable).
+# The profiler only runs while a handler runs, not while it awaits: other
+# sessions' handlers run on the same event loop meanwhile.
+import contextvars
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import types
+from collections import deque
+from functools import wraps
+
+ENABLED = os.environ.get("RULETA_INSTRUMENT") == "1" or "--instrument" in sys.argv
+CPROFILE_PATH = os.environ.get("RULETA_CPROFILE")
+
+# JSON dumps go to Flet's temp storage when running under "flet run"
+# (the system temp folder otherwise, see dump())
+DUMP_DIR = os.environ.get("FLET_APP_STORAGE_TEMP")
+
+ROLLING_WINDOW = 500
+HISTOGRAM_EDGES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+# Only one session per process writes a cProfile file
+_profile_lock = threading.Lock()
+_profile_claimed = False
+
+
+def _percentile(ordered, p):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+# Rolling samples of one handler
+class HandlerStats:
+    def __init__(self):
+        self.count = 0
+        self.samples = deque(maxlen=ROLLING_WINDOW)  # (wall ms, controls touched, page updates)
+
+    def add(self, wall_ms, controls, updates):
+        self.count += 1
+        self.samples.append((wall_ms, controls, updates))
+
+    # Counts of the rolling samples per wall time bucket; the last bucket is
+    # for anything slower than the last edge
+    def histogram(self):
+        buckets = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for wall_ms, _, _ in self.samples:
+            bucket = 0
+            while bucket < len(HISTOGRAM_EDGES_MS) and wall_ms > HISTOGRAM_EDGES_MS[bucket]:
+                bucket += 1
+            buckets[bucket] += 1
+        return buckets
+
+    def summary(self):
+        times = sorted(sample[0] for sample in self.samples)
+        window = len(self.samples) or 1
+        return {
+            "count": self.count,
+            "window": len(self.samples),
+            "p50_ms": _percentile(times, 50),
+            "p90_ms": _percentile(times, 90),
+            "p99_ms": _percentile(times, 99),
+            "max_ms": times[-1] if times else 0.0,
+            "mean_controls": sum(sample[1] for sample in self.samples) / window,
+            "mean_updates": sum(sample[2] for sample in self.samples) / window,
+            "histogram_edges_ms": list(HISTOGRAM_EDGES_MS),
+            "histogram": self.histogram(),
+        }
+
+
+# Instrumentation of one session. Reads the counters of its UpdateBatch to
+# know how many controls and page.update() calls each handler caused.
+class Instrumentation:
+    def __init__(self, updates, session_id=""):
+        self.updates = updates
+        self.session_id = session_id
+        self.stats = {}
+        self.on_record = None  # Called after each top-level handler call
+        # Handlers running in the current task, so interleaved handlers of
+        # other tasks are not counted as nested calls
+        self._depth = contextvars.ContextVar(f"handler_depth_{id(self)}", default=0)
+        self._profiling = 0  # Nested synchronous sections with the profiler on
+
+        # Profile this session if it is the first one asking
+        global _profile_claimed
+        self.profiler = None
+        if CPROFILE_PATH:
+            with _profile_lock:
+                if not _profile_claimed:
+                    import cProfile
+                    _profile_claimed = True
+                    self.profiler = cProfile.Profile()
+
+    # Return handler wrapped so each call is recorded under name
+    def wrap(self, name, handler):
+        if inspect.iscoroutinefunction(handler):
+            @wraps(handler)
+            async def instrumented(*args, **kwargs):
+                started = self._begin()
+                try:
+                    coroutine = handler(*args, **kwargs)
+                    return await (self._profiled(coroutine) if self.profiler else coroutine)
+                finally:
+                    self._end(name, started)
+        else:
+            @wraps(handler)
+            def instrumented(*args, **kwargs):
+                started = self._begin()
+                self._profile_on()
+                try:
+                    return handler(*args, **kwargs)
+                finally:
+                    self._profile_off()
+                    self._end(name, started)
+        return instrumented
+
+    # Await a coroutine step by step, profiling each step but not the waits
+    # between them
+    @types.coroutine
+    def _profiled(self, coroutine):
+        value, error = None, None
+        while True:
+            self._profile_on()
+            try:
+                awaited = coroutine.throw(error) if error else coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._profile_off()
+            try:
+                value, error = (yield awaited), None
+            except BaseException as exception:
+                value, error = None, exception
+
+    def _profile_on(self):
+        if self.profiler:
+            if self._profiling == 0:
+                self.profiler.enable()
+            self._profiling += 1
+
+    def _profile_off(self):
+        if self.profiler:
+            self._profiling -= 1
+            if self._profiling == 0:
+                self.profiler.disable()
+
+    def _begin(self):
+        depth = self._depth.get()
+        self._depth.set(depth + 1)
+        return time.perf_counter(), self.updates.controls_marked, self.updates.patches_sent, depth
+
+    def _end(self, name, started):
+        start_time, marked, patches, depth = started
+        wall_ms = (time.perf_counter() - start_time) * 1000
+        self._depth.set(depth)
+        self.stats.setdefault(name, HandlerStats()).add(
+            wall_ms,
+            self.updates.controls_marked - marked,
+            self.updates.patches_sent - patches,
+        )
+        if depth == 0 and self.on_record:
+            self.on_record()
+
+    def snapshot(self):
+        return {
+            "session": self.session_id,
+            "rolling_window": ROLLING_WINDOW,
+            "handlers": {name: stats.summary() for name, stats in self.stats.items()},
+        }
+
+    # Text table for the debug overlay
+    def report(self):
+        lines = [f"{'handler':<20}{'n':>6}{'p50':>8}{'p99':>8}{'max':>8}{'ctrls':>7}{'upd':>5}"]
+        for name, stats in self.stats.items():
+            s = stats.summary()
+            lines.append(f"{name:<20}{s['count']:>6}{s['p50_ms']:>8.2f}{s['p99_ms']:>8.2f}"
+                         f"{s['max_ms']:>8.2f}{s['mean_controls']:>7.1f}{s['mean_updates']:>5.1f}")
+            # Histogram of the rolling window, one column per bucket
+            bars = " ▁▂▃▄▅▆▇█"
+            counts = s["histogram"]
+            peak = max(counts) or 1
+            lines.append(f"{'':<20}{''.join(bars[round(c / peak * 8)] for c in counts)}  "
+                         f"≤{HISTOGRAM_EDGES_MS[0]}..>{HISTOGRAM_EDGES_MS[-1]} ms")
+        return "\n".join(lines)
+
+    # Write the rolling stats as JSON; returns the file path
+    def dump(self, path=None):
+        if not path:
+            import tempfile
+            directory = DUMP_DIR or tempfile.gettempdir()
+            path = os.path.join(directory, f"ruleta-instrumentation-{self.session_id}.json")
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        if self.profiler:
+            self.profiler.dump_stats(CPROFILE_PATH)
+        return path
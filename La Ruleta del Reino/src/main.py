@@ -1,5 +1,45 @@
+import os
+
 import flet as ft
-import unicodedata
+
+import instrumentation
+import snapshot
+from cells import CellPool, size_cell, style_cell
+from event_log import open_event_log
+from panel_state import ALPHABET, PENDING, REVEALED, PanelState, guessable, layout_rows
+from phrase_bank import ALL_CATEGORIES, open_phrase_bank
+from reveal_scheduler import RevealScheduler
+from updates import UpdateBatch
+from word_index import open_word_index, panel_patterns
+
+# Seconds between letters when pending letters are revealed automatically
+REVEAL_INTERVAL = 0.8
+
+# Optional phrase bank index for random phrases (build it with phrase_bank.py)
+PHRASE_BANK_PATH = os.environ.get(
+    "RULETA_PHRASE_BANK", os.path.join(os.path.dirname(__file__), "assets", "frases.rrpb")
+)
+
+# Random phrases must fit the panel in this many rows
+MAX_PANEL_ROWS = 4
+
+# Optional word index for the "Pista" hints (build it with word_index.py)
+WORD_INDEX_PATH = os.environ.get(
+    "RULETA_DICTIONARY", os.path.join(os.path.dirname(__file__), "assets", "palabras.rrwi")
+)
+
+# Candidate words listed per panel word in the hints
+HINTS_PER_WORD = 8
+
+# Keys that show the next pending letter in keyboard mode
+ADVANCE_KEYS = (" ", "Space", "Enter", "Return", "Numpad Enter")
+
+# Optional log of the game actions for classroom analytics (see event_log.py)
+EVENT_LOG_PATH = os.environ.get("RULETA_EVENT_LOG")
+
+# Panel renderer at startup: "containers" (a Container per cell) or "canvas"
+# (the whole panel on one canvas, see canvas_panel.py). The "Lienzo" switch changes it.
+PANEL_RENDERER = os.environ.get("RULETA_RENDERER", "containers")
 
 def main(page: ft.Page):
     # Set the app title and properties
@@ -8,263 +48,294 @@ def main(page: ft.Page):
     page.theme_mode = ft.ThemeMode.LIGHT
     page.bgcolor = ft.Colors.BLUE_50
     
-    # Store the original phrase and game state
-    original_phrase = ""
-    pending_reveals = []  # List to store positions of letters waiting to be revealed
+    # Game state for the current panel (see panel_state.PanelState)
+    panel_state = None
+    cells = []  # Cell containers, indexed by position in panel_state.phrase
+    cell_pool = CellPool()  # Cell containers are recycled between panels
+    cell_column = None  # Column with the rows of cells (kept between panels)
+    
+    # Canvas renderer (see canvas_panel.CanvasPanel), created when first used
+    use_canvas = PANEL_RENDERER == "canvas"
+    canvas_panel = None
+    
+    # Changed controls are sent once per user action (see updates.UpdateBatch)
+    updates = UpdateBatch(page)
+    
+    # Opt-in handler instrumentation (see instrumentation.py)
+    handler_stats = None
+    if instrumentation.ENABLED:
+        handler_stats = instrumentation.Instrumentation(updates, page.session_id)
+    
+    # Wrap a handler so its calls are recorded when instrumentation is on
+    def instrument(name, handler):
+        return handler_stats.wrap(name, handler) if handler_stats else handler
+    
+    # Show-style automatic reveal of pending letters (see reveal_scheduler.RevealScheduler).
+    # Handlers are async so they run on the same event loop as its ticks.
+    reveal_scheduler = RevealScheduler(lambda: reveal_tick(), interval=REVEAL_INTERVAL)
+    
+    # The game is saved after every change so a new session can resume it (see snapshot.py)
+    snapshot_store = snapshot.open_store(page)
+    snapshot_saved = False  # The store holds this session's panel
+    
+    # Phrase bank shared by all sessions, None when there is no index file
+    phrase_bank = open_phrase_bank(PHRASE_BANK_PATH)
+    
+    # Dictionary for the hints shared by all sessions, None when there is no index file
+    word_index = open_word_index(WORD_INDEX_PATH)
+    
+    # Log of the game actions shared by all sessions, None unless RULETA_EVENT_LOG is set
+    event_log = open_event_log(EVENT_LOG_PATH)
+    log_session = event_log.session(page.session_id) if event_log else None
+    
+    # Presenter/spectator mode (see broadcast.py): a host publishes its actions
+    # to a room, a spectator mirrors the host's panel
+    presenter = None
+    spectator = None
+    
+    # Points of the game: a spin of the wheel (see wheel.py) sets the points
+    # per letter found by the next guess
+    score = 0
+    turn_points = None
+    roulette = None  # The wheel, created the first time it is spun
     
     # Set default panel dimensions
     letter_width = 40
     max_chars_per_row = 12
     
-    # Helper function to normalize Spanish letters (remove accents for comparison)
-    def normalize_letter(letter):
-        # Normalize to NFD form to separate base character and accent
-        normalized = unicodedata.normalize('NFD', letter)
-        # Keep only the base character (removing combining marks)
-        base_letter = ''.join([c for c in normalized if not unicodedata.combining(c)])
-        # Special case for ñ which should remain ñ (not n)
-        if letter.lower() == 'ñ':
-            return 'ñ'
-        return base_letter
-    
-    # Function to check if two letters match, ignoring accents
-    def letters_match(letter1, letter2):
-        return normalize_letter(letter1.upper()) == normalize_letter(letter2.upper())
-    
     # Function to handle button click and create panel
-    def create_panel(e):
-        # Clear any existing panel
-        panel_container.content = None
-        
-        phrase = phrase_input.value.upper()  # Convert to uppercase
-        if not phrase:
+    async def create_panel(e):
+        start_presenting()
+        start_panel(phrase_input.value)
+    
+    # Function to start a panel with a random phrase from the bank that fits the current layout
+    async def create_random_panel(e):
+        category = category_dropdown.value
+        level = level_dropdown.value
+        phrase = phrase_bank.random_phrase(
+            ALL_CATEGORIES if category == ANY_CATEGORY else category,
+            max_rows=MAX_PANEL_ROWS,
+            max_chars_per_row=max_chars_per_row,
+            level=None if level == ANY_CATEGORY else level,
+        )
+        if phrase:
+            start_presenting()
+            start_panel(phrase)
+    
+    # Function to set up the panel for a phrase
+    def start_panel(phrase):
+        phrase = phrase.upper()  # Convert to uppercase
+        if not phrase.strip():
             return
-            
-        # Store the original phrase for later validation
-        nonlocal original_phrase
-        original_phrase = phrase
-        
-        # Clear any pending reveals
-        nonlocal pending_reveals
-        pending_reveals = []
-        
-        rows = []
-        current_row = ft.Row(alignment=ft.MainAxisAlignment.CENTER, spacing=2)
-        chars_in_row = 0
         
-        # Split the phrase into words
-        words = phrase.split()
+        # Build the game state once; guesses and reveals work on it
+        show_panel(PanelState(phrase))
+        save_snapshot()
+        if event_log:
+            event_log.panel(log_session, panel_state.phrase)
         
-        # Process each word
-        i = 0
-        while i < len(words):
-            word = words[i]
-            
-            # Check if this word would exceed the line width
-            if chars_in_row + len(word) > max_chars_per_row:
-                # If the word alone exceeds the max width, it must be placed on a new line
-                if chars_in_row == 0:
-                    # Add each character of this long word
-                    for char in word:
-                        # Add the character
-                        create_character_container(current_row, char)
-                        chars_in_row += 1
-                        
-                        # Start a new row if needed
-                        if chars_in_row >= max_chars_per_row and char != word[-1]:
-                            rows.append(current_row)
-                            current_row = ft.Row(alignment=ft.MainAxisAlignment.CENTER, spacing=2)
-                            chars_in_row = 0
-                    
-                    # Add a space after the word (unless it's the last word)
-                    if i < len(words) - 1:
-                        create_character_container(current_row, ' ')
-                        chars_in_row += 1
-                else:
-                    # If we already have content on this line, start a new line
-                    rows.append(current_row)
-                    current_row = ft.Row(alignment=ft.MainAxisAlignment.CENTER, spacing=2)
-                    chars_in_row = 0
-                    # Don't increment i, we'll process this word on the new line
-                    continue
-            else:
-                # Add each character of the word
-                for char in word:
-                    create_character_container(current_row, char)
-                    chars_in_row += 1
-                
-                # Add a space after the word (unless it's the last word)
-                if i < len(words) - 1:
-                    create_character_container(current_row, ' ')
-                    chars_in_row += 1
-            
-            i += 1
+        # Spectators in the room get the phrase, not the cells
+        if presenter:
+            presenter.panel(panel_state.phrase)
+    
+    # Function to show the cells of a game state, new or in progress
+    def show_panel(state):
+        # Stop revealing the previous panel
+        reveal_scheduler.cancel()
         
-        # Add the last row if it has any controls
-        if current_row.controls:
-            rows.append(current_row)
+        nonlocal panel_state
+        panel_state = state
+        render_panel()
         
-        # Place rows in a column
-        panel_container.content = ft.Column(rows, alignment=ft.MainAxisAlignment.CENTER, spacing=10)
+        # The guess controls are only built once there is a panel to guess
+        if guess_container.content is None:
+            build_guess_controls()
         
-        # Switch to guess mode
+        # Switch to guess mode (spectators only watch)
         setup_container.visible = False
-        guess_container.visible = True
+        guess_container.visible = spectator is None
         
         # Initialize button for "Adivinar"
         reset_guess_button()
+        show_used_letters()
+        if hints_text.visible:
+            refresh_hints()
         
-        page.update()
+        updates.mark(panel_container, setup_container, guess_container)
+        updates.flush()
     
-    # Helper function to create character containers
-    def create_character_container(row, char):
-        if char == ' ':
-            # Handle spaces - add a transparent container with a special data property
-            row.controls.append(
-                ft.Container(
-                    width=letter_width,
-                    height=letter_width * 1.5,
-                    margin=2,
-                    bgcolor=ft.Colors.TRANSPARENT,
-                    data="SPACE",  # Mark this as a space container
-                )
-            )
+    # Function to draw the whole panel with the current renderer
+    def render_panel():
+        nonlocal cells, cell_column, canvas_panel
+        if use_canvas:
+            # The canvas replaces the cells, which go back to the pool
+            cell_pool.release(cells)
+            cells = []
+            if canvas_panel is None:
+                from canvas_panel import CanvasPanel
+                canvas_panel = CanvasPanel()
+            panel_container.content = canvas_panel.canvas
         else:
-            # Determine if it's a special character
-            is_special = not char.isalnum()
+            # Reuse the cells of the previous panel, taking any extra ones from the pool
+            cells = cell_pool.recycle(cells, len(panel_state), letter_width)
+            for index, cell in enumerate(cells):
+                style_cell(cell, panel_state.states[index], panel_state.phrase[index])
             
-            # Create a rectangle for each letter
-            row.controls.append(
-                ft.Container(
-                    width=letter_width,
-                    height=letter_width * 1.5,
-                    margin=2,
-                    bgcolor=ft.Colors.WHITE,
-                    border=ft.border.all(2, ft.Colors.BLUE_800),
-                    border_radius=5,
-                    alignment=ft.alignment.center,
-                    content=ft.Text(
-                        # Show special characters immediately, hide others
-                        value=char if is_special else "",
-                        size=int(letter_width * 0.6),
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.BLACK,
-                    ),
-                    shadow=ft.BoxShadow(
-                        spread_radius=1,
-                        blur_radius=4,
-                        color=ft.Colors.BLUE_GREY_300,
-                        offset=ft.Offset(2, 2)
-                    ),
-                    data="NORMAL",  # Initial state
-                )
-            )
+            # Place the cells in rows inside a column (kept between panels)
+            if cell_column is None:
+                cell_column = ft.Column(alignment=ft.MainAxisAlignment.CENTER, spacing=10)
+            panel_container.content = cell_column
+        layout_panel()
+        updates.mark(panel_container)
     
-    # Function to apply the yellow highlight effect (without revealing letter)
-    def apply_highlight_effect(container, letter, position):
-        # Create a subtle yellow effect
-        container.bgcolor = "#FFF176"  # Light yellow color
-        
-        # Add a gentle glow effect
-        container.shadow = ft.BoxShadow(
-            spread_radius=1,
-            blur_radius=6,
-            color="#FFD54F80",  # Yellow with opacity
-            offset=ft.Offset(0, 0)
-        )
+    # Function to split the existing cells into rows without breaking words
+    def layout_panel():
+        rows = layout_rows(panel_state.phrase, max_chars_per_row)
+        if use_canvas:
+            canvas_panel.draw(panel_state, rows, letter_width)
+            updates.mark(canvas_panel.canvas)
+            return
+        column = cell_column
         
-        # Store the letter to be revealed later but don't show it yet
-        if container.content and isinstance(container.content, ft.Text):
-            container.content.value = ""  # Keep it blank for now
-            container.data = f"PENDING:{letter}"  # Mark as pending reveal with the letter
-            
-        # Add this position to our queue of letters to reveal
-        nonlocal pending_reveals
-        pending_reveals.append(position)
+        # Reuse the row controls we already have, only adding or dropping rows at the end
+        while len(column.controls) < len(rows):
+            column.controls.append(ft.Row(alignment=ft.MainAxisAlignment.CENTER, spacing=2))
+        del column.controls[len(rows):]
+        
+        # Move cells between rows; cells that stay in place are left untouched
+        for row, cell_range in zip(column.controls, rows):
+            row_cells = [cells[index] for index in cell_range]
+            if row.controls != row_cells:
+                row.controls = row_cells
+        updates.mark(column)
+    
+    # Function to resize the existing cells to the current letter width
+    def resize_cells():
+        if use_canvas:
+            layout_panel()
+            return
+        for cell in cells:
+            size_cell(cell, letter_width)
+        # Spaces where the phrase breaks are in no row, so they are not sent
+        updates.mark(*(cell for row in cell_column.controls for cell in row.controls))
+    
+    # Function to apply the yellow highlight effect (without revealing letter)
+    def apply_highlight_effect(container):
+        style_cell(container, PENDING, "")
+        updates.mark(container)
     
     # Function to restore the original appearance of a container while showing the letter
     def restore_original_appearance(container, letter):
-        # Reset to original styling
-        container.bgcolor = ft.Colors.WHITE
-        container.border = ft.border.all(2, ft.Colors.BLUE_800)
-        container.border_radius = 5
-        container.shadow = ft.BoxShadow(
-            spread_radius=1,
-            blur_radius=4,
-            color=ft.Colors.BLUE_GREY_300,
-            offset=ft.Offset(2, 2)
-        )
-        
-        # Show the letter
-        if container.content and isinstance(container.content, ft.Text):
-            container.content.value = letter
-            
-        # Mark as revealed
-        container.data = "REVEALED"
+        style_cell(container, REVEALED, letter)
+        updates.mark(container)
+    
+    # Function to show the current state of some cells with the current renderer
+    def show_cells(indices):
+        if use_canvas:
+            updates.mark(*canvas_panel.update_cells(panel_state, indices))
+            return
+        for index in indices:
+            if panel_state.states[index] == PENDING:
+                apply_highlight_effect(cells[index])
+            else:
+                restore_original_appearance(cells[index], panel_state.phrase[index])
     
     # Function to reveal the next pending letter
     def reveal_next_letter():
-        # Check if there are any letters to reveal
-        nonlocal pending_reveals
-        if not pending_reveals:
+        if not panel_state:
             return False
         
         # Get the position of the next letter to reveal
-        next_position = pending_reveals.pop(0)
-        row_index, container_index = next_position
-        
-        # Find the container at this position
-        if panel_container.content and len(panel_container.content.controls) > row_index:
-            row = panel_container.content.controls[row_index]
-            if len(row.controls) > container_index:
-                container = row.controls[container_index]
-                
-                # Extract the letter from the data
-                if hasattr(container, "data") and isinstance(container.data, str) and container.data.startswith("PENDING:"):
-                    letter = container.data.split(":", 1)[1]
-                    
-                    # Restore original appearance and show letter
-                    restore_original_appearance(container, letter)
-                    return True
-        
-        return False
+        index = panel_state.reveal_next()
+        if index is None:
+            return False
+        
+        # Restore original appearance and show letter
+        show_cells((index,))
+        if event_log:
+            event_log.reveal(log_session, index)
+        if presenter:
+            presenter.revealed((index,))
+        return True
+    
+    # Function to reveal every pending letter at once; spectators get them in one event
+    def reveal_pending_letters():
+        revealed = []
+        while panel_state.has_pending:
+            revealed.append(panel_state.reveal_next())
+        show_cells(revealed)
+        if event_log:
+            for index in revealed:
+                event_log.reveal(log_session, index)
+        if presenter:
+            presenter.revealed(revealed)
+    
+    # One tick of the automatic reveal: show the next letter and send it
+    def reveal_tick():
+        reveal_next_letter()
+        if not panel_state.has_pending:
+            reset_guess_button()
+        send_changes()
+        return panel_state.has_pending
     
     # Function to reveal all letters in the panel
-    def reveal_all_letters(e):
-        if not panel_container.content or not original_phrase:
+    async def reveal_all_letters(e):
+        if not panel_state:
             return
-            
-        phrase_index = 0  # Index in the original phrase
-        
-        for row in panel_container.content.controls:
-            for container in row.controls:
-                # Skip space containers (transparent ones)
-                if hasattr(container, "data") and container.data == "SPACE":
-                    phrase_index += 1
-                    continue
-                    
-                # For letter containers that aren't already revealed
-                if container.content and isinstance(container.content, ft.Text):
-                    if phrase_index < len(original_phrase) and container.content.value == "":
-                        # Restore original appearance and reveal the letter
-                        restore_original_appearance(container, original_phrase[phrase_index])
-                
-                # Increment our index in the original phrase
-                phrase_index += 1
-        
-        # Clear any pending reveals
-        nonlocal pending_reveals
-        pending_reveals = []
+        
+        # Stop the automatic reveal first so no tick runs after the panel is solved
+        reveal_scheduler.cancel()
+        
+        # Only hidden and pending cells change
+        revealed = panel_state.reveal_all()
+        show_cells(revealed)
+        if event_log:
+            event_log.solve(log_session, len(revealed))
+        if presenter:
+            presenter.revealed(revealed)
         
         # Reset button to "Adivinar" mode
         reset_guess_button()
         
-        page.update()
+        send_changes()
+    
+    # Function to go back to the setup screen for another phrase or room ("Nueva frase").
+    # The panel is taken off the screen (spectators' too) and the saved game is dropped.
+    async def new_phrase(e):
+        nonlocal snapshot_saved
+        clear_panel()
+        snapshot_store.clear()
+        snapshot_saved = False
+        if presenter:
+            presenter.reset()
+        guess_container.visible = False
+        setup_container.visible = True
+        updates.mark(guess_container, setup_container)
+        updates.flush()
+    
+    # Function to take the panel off the screen; its cells are kept for the next one
+    def clear_panel():
+        nonlocal panel_state
+        reveal_scheduler.cancel()
+        panel_state = None
+        panel_container.content = None
+        updates.mark(panel_container)
+    
+    # Function to grey out the guessed letters on the alphabet board. Only the keys
+    # that changed are sent: the new letter after a guess, the used ones on a new panel.
+    def show_used_letters():
+        nonlocal board_mask
+        changed = board_mask ^ panel_state.guessed
+        board_mask = panel_state.guessed
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            key = letter_keys[bit.bit_length() - 1]
+            style_letter_key(key, board_mask & bit)
+            updates.mark(key)
     
     # Function to reset the guess button to "Adivinar" mode
     def reset_guess_button():
-        nonlocal pending_reveals
-        pending_reveals = []
         guess_button.text = "Adivinar"
         guess_button.icon = ft.Icons.CHECK_CIRCLE
         guess_button.style = ft.ButtonStyle(
@@ -272,86 +343,470 @@ def main(page: ft.Page):
             bgcolor=ft.Colors.GREEN,
         )
         guess_button.on_click = guess_letter
-        page.update()
+        updates.mark(guess_button)
+    
+    # Function to switch the guess button to "Siguiente" mode
+    def show_next_button():
+        guess_button.text = "Siguiente"
+        guess_button.icon = ft.Icons.ARROW_FORWARD
+        guess_button.style = ft.ButtonStyle(
+            color=ft.Colors.WHITE,
+            bgcolor=ft.Colors.BLUE,
+        )
+        updates.mark(guess_button)
     
     # Function to handle letter guessing or revealing next letter
-    def guess_letter(e):
-        # If there are pending letters to reveal, reveal the next one
-        nonlocal pending_reveals
-        if pending_reveals:
-            reveal_next_letter()
-            
-            # If no more pending letters, reset button
-            if not pending_reveals:
-                reset_guess_button()
-                
-            page.update()
+    async def guess_letter(e):
+        if not panel_state:
             return
         
         letter = guess_input.content.value.upper()
+        
+        # A new guess during the automatic reveal cancels it and shows the rest at once
+        if reveal_scheduler.running and letter:
+            finish_reveal()
+        
+        # If there are pending letters to reveal, reveal the next one
+        if panel_state.has_pending:
+            reveal_step()
+            return
+        
         if not letter or len(letter) != 1:
             return
-            
-        # Check for matches and highlight them
-        if panel_container.content:
-            phrase_index = 0  # Index in the original phrase
-            found_match = False
-            
-            # First, store positions of all matches
-            matches = []
-            row_index = 0
-            
-            for row in panel_container.content.controls:
-                container_index = 0
-                for container in row.controls:
-                    # Skip space containers (transparent ones)
-                    if hasattr(container, "data") and container.data == "SPACE":
-                        phrase_index += 1
-                        container_index += 1
-                        continue
-                        
-                    # Skip already revealed or pending containers
-                    if hasattr(container, "data") and (container.data == "REVEALED" or 
-                                                      (isinstance(container.data, str) and 
-                                                       container.data.startswith("PENDING:"))):
-                        phrase_index += 1
-                        container_index += 1
-                        continue
-                    
-                    # For regular letter containers
-                    if container.content and isinstance(container.content, ft.Text):
-                        # Check if this letter matches the guessed letter, ignoring accents
-                        if phrase_index < len(original_phrase) and letters_match(original_phrase[phrase_index], letter):
-                            # Store this match for later processing
-                            matches.append((row_index, container_index, original_phrase[phrase_index]))
-                            found_match = True
-                    
-                    # Increment indices
-                    phrase_index += 1
-                    container_index += 1
-                
-                row_index += 1
-            
-            # Now process all matches - apply highlight effect
-            for match in matches:
-                row_index, container_index, original_letter = match
-                row = panel_container.content.controls[row_index]
-                container = row.controls[container_index]
-                # Use the original letter from the phrase (preserving accents)
-                apply_highlight_effect(container, original_letter, (row_index, container_index))
-            
-            # If any matches were found, change button to "Siguiente"
-            if found_match:
-                guess_button.text = "Siguiente"
-                guess_button.icon = ft.Icons.ARROW_FORWARD
-                guess_button.style = ft.ButtonStyle(
-                    color=ft.Colors.WHITE,
-                    bgcolor=ft.Colors.BLUE,
-                )
         
         # Clear the guess input for next guess
         guess_input.content.value = ""
-        page.update()
+        updates.mark(guess_input.content)
+        
+        # A symbol, or a letter or digit already guessed this round, changes nothing else
+        if not guessable(letter) or panel_state.guessed_before(letter):
+            updates.flush()
+            return
+        guess(letter)
+    
+    # Function to guess straight from a key press in keyboard mode: a letter or digit is
+    # a guess, Space or Return shows the next pending letter. Nothing goes
+    # through the guess field, so a guess is a single event.
+    async def guess_key(key):
+        if not panel_state:
+            return
+        
+        if key in ADVANCE_KEYS:
+            if panel_state.has_pending and not reveal_scheduler.running:
+                reveal_step()
+            return
+        
+        # Like in the guess field, only letters and digits not guessed yet this round count
+        if not guessable(key) or panel_state.guessed_before(key):
+            return
+        
+        # Like a guess during the automatic reveal, the letters still pending are shown first
+        if panel_state.has_pending:
+            finish_reveal()
+        guess(key.upper())
+    
+    # Function to show the rest of the pending letters at once, before a new guess
+    def finish_reveal():
+        reveal_scheduler.cancel()
+        reveal_pending_letters()
+        reset_guess_button()
+    
+    # Function to show the next pending letter ("Siguiente")
+    def reveal_step():
+        reveal_next_letter()
+        
+        # If no more pending letters, reset button
+        if not panel_state.has_pending:
+            reset_guess_button()
+        
+        send_changes()
+    
+    # Function to guess a letter: highlight its hidden cells (ignoring accents) and send them
+    def guess(letter):
+        nonlocal score, turn_points
+        matches = panel_state.guess(letter)
+        show_cells(matches)
+        show_used_letters()
+        if event_log:
+            event_log.guess(log_session, letter, len(matches))
+        if presenter:
+            presenter.pending(matches)
+        
+        # If any matches were found, change button to "Siguiente"
+        if matches:
+            show_next_button()
+        
+        # The points of the last spin go to this guess, for every letter found
+        if turn_points is not None:
+            score += turn_points * len(matches)
+            turn_text.value = f"+{turn_points * len(matches)} puntos" if matches else "Ninguna letra, sin puntos"
+            turn_points = None
+            show_score()
+        send_changes()
+        
+        # Reveal the matches on our own when automatic mode is on
+        if matches and auto_reveal_switch.value:
+            reveal_scheduler.start()
+    
+    # Function to spin the wheel for the points of the next guess
+    async def spin_wheel(e):
+        nonlocal roulette, turn_points
+        if roulette is None:
+            from wheel import Wheel  # Only loaded once the wheel is used
+            roulette = Wheel()
+            wheel_row.controls.insert(0, roulette.view)
+            if handler_stats:
+                handler_stats.stats["wheel_frame"] = roulette.stats
+        if roulette.spinning:
+            return
+        turn_points = None
+        turn_text.value = "Girando..."
+        wheel_row.visible = True
+        updates.mark(wheel_row)
+        updates.flush()
+        roulette.spin(send_frame, wheel_stopped)
+    
+    # Send one frame of the wheel: only its rotation changes
+    def send_frame(control):
+        updates.mark(control)
+        updates.flush()
+    
+    # Function to take the result of a spin
+    def wheel_stopped(wedge):
+        nonlocal score, turn_points
+        from wheel import QUIEBRA
+        if wedge.label == QUIEBRA:
+            score = 0
+            turn_text.value = "¡Quiebra! Pierdes los puntos"
+        elif wedge.points is None:
+            turn_text.value = "Pierde turno"
+        else:
+            turn_points = wedge.points
+            turn_text.value = f"{wedge.points} puntos por letra"
+        show_score()
+        updates.flush()
+    
+    # Function to show the score and the result of the turn
+    def show_score():
+        score_text.value = f"Puntos: {score}"
+        updates.mark(turn_text, score_text)
+    
+    # Function to turn keyboard mode on or off; the guess field is not needed with it
+    async def toggle_keyboard(e):
+        guess_input.visible = not keyboard_switch.value
+        updates.mark(guess_input)
+        updates.flush()
+    
+    # Function to turn the automatic reveal on or off
+    async def toggle_auto_reveal(e):
+        if auto_reveal_switch.value and panel_state and panel_state.has_pending:
+            reveal_scheduler.start()
+        elif not auto_reveal_switch.value:
+            reveal_scheduler.cancel()
+    
+    # Function to switch between the container and the canvas renderer
+    async def toggle_renderer(e):
+        nonlocal use_canvas
+        use_canvas = renderer_switch.value
+        if panel_state:
+            render_panel()
+        updates.flush()
+    
+    # Function to list candidate words for the words of the panel that are not solved yet
+    def refresh_hints():
+        lines = []
+        for cell_range, pattern in panel_patterns(panel_state):
+            count, words = word_index.candidates(pattern, panel_state.guessed, HINTS_PER_WORD)
+            shown = " ".join(
+                panel_state.phrase[index] if letter else "_"
+                for index, letter in zip(cell_range, pattern)
+            )
+            more = f" (+{count - len(words)})" if count > len(words) else ""
+            lines.append(f"{shown}: {', '.join(words) or '—'}{more}")
+        hints_text.value = "\n".join(lines) or "No quedan palabras por resolver"
+        updates.mark(hints_text)
+    
+    # Function to show or hide the hints
+    async def toggle_hints(e):
+        hints_text.visible = not hints_text.visible
+        if hints_text.visible:
+            refresh_hints()
+        updates.mark(hints_text)
+        updates.flush()
+    
+    # Send the changes of a user action, keeping the hints and the saved game up to date
+    def send_changes():
+        if hints_text.visible:
+            refresh_hints()
+        updates.flush()
+        save_snapshot()
+    
+    # Save the game as it is now; spectators follow the host and save nothing.
+    # A solved panel is dropped instead, so the next session opens on the setup screen.
+    def save_snapshot():
+        nonlocal snapshot_saved
+        if not panel_state or spectator is not None:
+            return
+        if not panel_state.solved:
+            snapshot_store.save(panel_state)
+            snapshot_saved = True
+        elif snapshot_saved:
+            snapshot_store.clear()
+            snapshot_saved = False
+    
+    # Resume the game saved by an earlier session, unless a panel was started meanwhile
+    async def resume_snapshot():
+        try:
+            state = await snapshot_store.load()
+        except ValueError:
+            return  # Not a snapshot we can read; the next save replaces it
+        if state is None or panel_state or spectator:
+            return
+        show_panel(state)
+        if state.has_pending:
+            show_next_button()
+            updates.flush()
+    
+    # Start publishing this session's panels when a room is entered
+    def start_presenting():
+        nonlocal presenter
+        room = room_input.value.strip()
+        if presenter and presenter.room != room:
+            presenter.close()
+            presenter = None
+        if room and not presenter:
+            import broadcast  # Rooms are optional, so this is only loaded when one is used
+            presenter = broadcast.Presenter(page.pubsub, room, lambda: panel_state)
+    
+    # Function to follow the panel of a room's host
+    async def watch_room(e):
+        nonlocal spectator
+        room = room_input.value.strip()
+        if not room:
+            return
+        if spectator:
+            spectator.close()
+        import broadcast
+        spectator = broadcast.Spectator(page.pubsub, room, page.session_id, apply_broadcast)
+        watching_text.value = f"Sala {room}: esperando al presentador"
+        watching_text.visible = True
+        setup_container.visible = False
+        updates.mark(watching_text, setup_container)
+        updates.flush()
+    
+    # Apply an event from the host to our own cells; only changed cells are sent
+    async def apply_broadcast(event):
+        import broadcast
+        kind = event[0]
+        if kind == broadcast.PANEL or kind == broadcast.SYNC:
+            # A new panel, or the panel in progress when we joined
+            state = PanelState(event[1])
+            if kind == broadcast.SYNC:
+                state.restore(event[2], event[3])
+            watching_text.value = f"Sala {spectator.room}"
+            updates.mark(watching_text)
+            show_panel(state)
+        elif kind == broadcast.RESET:
+            # The host went back to the setup screen
+            clear_panel()
+            watching_text.value = f"Sala {spectator.room}: esperando al presentador"
+            updates.mark(watching_text)
+            updates.flush()
+        elif panel_state:
+            cell_state = PENDING if kind == broadcast.PENDING_CELLS else REVEALED
+            indices = event[1]
+            panel_state.apply(indices, cell_state)
+            show_cells(indices)
+            updates.flush()
+    
+    # Function to style a key of the alphabet board as guessed or not
+    def style_letter_key(key, used):
+        key.bgcolor = ft.Colors.BLUE_GREY_100 if used else ft.Colors.WHITE
+        key.content.color = ft.Colors.BLUE_GREY_300 if used else ft.Colors.BLUE_900
+    
+    # Function to build the guess controls, the first time a panel is shown.
+    # They are not needed for the setup screen, so startup skips them.
+    def build_guess_controls():
+        nonlocal guess_input, guess_button, solve_button, auto_reveal_switch, next_random_button
+        nonlocal keyboard_switch, renderer_switch, hints_text, wheel_row, turn_text, score_text
+        nonlocal letter_keys
+        
+        # Guess UI - TextField inside a Container for styling
+        guess_input = ft.Container(
+            width=60,  # Make it square like the panel rectangles
+            height=60,
+            bgcolor=ft.Colors.WHITE,
+            border=ft.border.all(2, ft.Colors.BLUE_800),
+            border_radius=5,
+            padding=5,
+            alignment=ft.alignment.center,
+            content=ft.TextField(
+                width=40,
+                height=50,
+                text_align=ft.TextAlign.CENTER,
+                max_length=1,
+                text_size=24,
+                border_color=ft.Colors.TRANSPARENT,
+                border_width=0,
+                cursor_color=ft.Colors.BLUE,
+                content_padding=2,
+            ),
+            shadow=ft.BoxShadow(
+                spread_radius=1,
+                blur_radius=4,
+                color=ft.Colors.BLUE_GREY_300,
+                offset=ft.Offset(2, 2)
+            )
+        )
+        
+        # Button that changes between "Adivinar" and "Siguiente"
+        guess_button = ft.ElevatedButton(
+            text="Adivinar",
+            on_click=guess_letter,
+            style=ft.ButtonStyle(
+                color=ft.Colors.WHITE,
+                bgcolor=ft.Colors.GREEN,
+            ),
+            icon=ft.Icons.CHECK_CIRCLE
+        )
+        
+        # Button to solve the entire puzzle
+        solve_button = ft.ElevatedButton(
+            text="Resolver",
+            on_click=reveal_all_letters,
+            style=ft.ButtonStyle(
+                color=ft.Colors.WHITE,
+                bgcolor=ft.Colors.RED_700,
+            ),
+            icon=ft.Icons.AUTO_AWESOME
+        )
+        
+        # Back to the setup screen, to type another phrase or enter a room
+        new_phrase_button = ft.IconButton(
+            icon=ft.Icons.EDIT_NOTE,
+            tooltip="Nueva frase",
+            on_click=new_phrase,
+            icon_color=ft.Colors.BLUE_800,
+        )
+        
+        # Same as random_button, from the guess row, to go straight to the next phrase
+        next_random_button = ft.IconButton(
+            icon=ft.Icons.SHUFFLE,
+            tooltip="Otra frase aleatoria",
+            on_click=create_random_panel,
+            icon_color=ft.Colors.INDIGO,
+            visible=phrase_bank is not None,
+        )
+        
+        # Switch to reveal matched letters automatically instead of with "Siguiente"
+        auto_reveal_switch = ft.Switch(
+            label="Automático",
+            value=False,
+            active_color=ft.Colors.BLUE,
+            on_change=toggle_auto_reveal,
+        )
+        
+        # Switch to guess by typing letters anywhere on the page (see guess_key)
+        keyboard_switch = ft.Switch(
+            label="Teclado",
+            value=False,
+            active_color=ft.Colors.BLUE,
+            on_change=toggle_keyboard,
+        )
+        
+        # Switch to draw the panel on one canvas instead of a container per cell
+        renderer_switch = ft.Switch(
+            label="Lienzo",
+            value=use_canvas,
+            active_color=ft.Colors.BLUE,
+            on_change=toggle_renderer,
+        )
+        
+        # "Pista": candidate words for the panel, only shown when there is a word index
+        hint_button = ft.IconButton(
+            icon=ft.Icons.LIGHTBULB_OUTLINE,
+            tooltip="Pista",
+            on_click=toggle_hints,
+            icon_color=ft.Colors.AMBER_800,
+            visible=word_index is not None,
+        )
+        
+        # Spin the wheel for the points of the next guess
+        spin_button = ft.IconButton(
+            icon=ft.Icons.CASINO,
+            tooltip="Girar la ruleta",
+            on_click=spin_wheel,
+            icon_color=ft.Colors.DEEP_ORANGE,
+        )
+        
+        # The wheel goes first in this row, shown from the first spin
+        turn_text = ft.Text(size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
+        score_text = ft.Text(value="Puntos: 0", size=16, color=ft.Colors.BLUE_900)
+        wheel_row = ft.Row(
+            [ft.Column([turn_text, score_text], spacing=5)],
+            alignment=ft.MainAxisAlignment.CENTER,
+            spacing=20,
+            visible=False,
+        )
+        
+        # Alphabet board with the letters guessed this round greyed out, one key per
+        # letter of panel_state.ALPHABET (the order of the bits of panel_state.guessed)
+        letter_keys = []
+        for letter in ALPHABET:
+            key = ft.Container(
+                content=ft.Text(letter.upper(), size=14, weight=ft.FontWeight.BOLD),
+                width=26,
+                height=30,
+                border_radius=4,
+                alignment=ft.alignment.center,
+            )
+            style_letter_key(key, False)
+            letter_keys.append(key)
+        
+        hints_text = ft.Text(
+            size=14,
+            color=ft.Colors.BLUE_GREY_800,
+            text_align=ft.TextAlign.CENTER,
+            selectable=True,
+            visible=False,
+        )
+        
+        # Row for guessing (letter input, guess button, solve button and auto reveal switch)
+        # with the alphabet board, the wheel and the hints under it
+        guess_container.content = ft.Column([
+            ft.Row([
+                guess_input,
+                guess_button,
+                solve_button,  # Added the solve button here
+                auto_reveal_switch,
+                keyboard_switch,
+                renderer_switch,
+                new_phrase_button,
+                next_random_button,
+                hint_button,
+                spin_button,
+            ], alignment=ft.MainAxisAlignment.CENTER, spacing=10),
+            ft.Row(letter_keys, alignment=ft.MainAxisAlignment.CENTER, spacing=4, wrap=True),
+            wheel_row,
+            ft.Row([hints_text], alignment=ft.MainAxisAlignment.CENTER),
+        ], spacing=5)
+    
+    # Record the handlers when instrumentation is on; rebinding the names also
+    # covers the calls between them (e.g. guess_letter -> reveal_next_letter)
+    create_panel = instrument("create_panel", create_panel)
+    create_random_panel = instrument("create_random_panel", create_random_panel)
+    guess_letter = instrument("guess_letter", guess_letter)
+    guess_key = instrument("guess_key", guess_key)
+    reveal_next_letter = instrument("reveal_next_letter", reveal_next_letter)
+    reveal_all_letters = instrument("reveal_all_letters", reveal_all_letters)
+    new_phrase = instrument("new_phrase", new_phrase)
+    watch_room = instrument("watch_room", watch_room)
+    apply_broadcast = instrument("apply_broadcast", apply_broadcast)
+    resume_snapshot = instrument("resume_snapshot", resume_snapshot)
+    toggle_hints = instrument("toggle_hints", toggle_hints)
+    toggle_renderer = instrument("toggle_renderer", toggle_renderer)
+    toggle_keyboard = instrument("toggle_keyboard", toggle_keyboard)
+    spin_wheel = instrument("spin_wheel", spin_wheel)
     
     # Create UI components
     title = ft.Text(
@@ -389,54 +844,65 @@ def main(page: ft.Page):
         icon=ft.Icons.PLAY_ARROW_ROUNDED
     )
     
-    # Guess UI - TextField inside a Container for styling
-    guess_input = ft.Container(
-        width=60,  # Make it square like the panel rectangles
-        height=60,
-        bgcolor=ft.Colors.WHITE,
-        border=ft.border.all(2, ft.Colors.BLUE_800),
-        border_radius=5,
-        padding=5,
-        alignment=ft.alignment.center,
-        content=ft.TextField(
-            width=40,
-            height=50,
-            text_align=ft.TextAlign.CENTER,
-            max_length=1,
-            text_size=24,
-            border_color=ft.Colors.TRANSPARENT,
-            border_width=0,
-            cursor_color=ft.Colors.BLUE,
-            content_padding=2,
-        ),
-        shadow=ft.BoxShadow(
-            spread_radius=1,
-            blur_radius=4,
-            color=ft.Colors.BLUE_GREY_300,
-            offset=ft.Offset(2, 2)
-        )
+    # Room for presenter/spectator mode: the host enters it before "Comenzar",
+    # spectators enter the same room and click "Ver sala"
+    room_input = ft.TextField(
+        label="Sala (opcional)",
+        width=180,
+        text_align=ft.TextAlign.CENTER,
+        border=ft.InputBorder.OUTLINE,
     )
     
-    # Button that changes between "Adivinar" and "Siguiente"
-    guess_button = ft.ElevatedButton(
-        text="Adivinar",
-        on_click=guess_letter,
+    watch_button = ft.ElevatedButton(
+        text="Ver sala",
+        on_click=watch_room,
         style=ft.ButtonStyle(
             color=ft.Colors.WHITE,
-            bgcolor=ft.Colors.GREEN,
+            bgcolor=ft.Colors.TEAL,
         ),
-        icon=ft.Icons.CHECK_CIRCLE
+        icon=ft.Icons.CAST
+    )
+    
+    # Room being watched, shown to spectators instead of the guess controls
+    watching_text = ft.Text(
+        size=16,
+        color=ft.Colors.BLUE_900,
+        text_align=ft.TextAlign.CENTER,
+        visible=False,
+    )
+    
+    # Random phrase from the phrase bank, only shown when there is one
+    ANY_CATEGORY = "*"
+    category_dropdown = ft.Dropdown(
+        label="Categoría",
+        width=220,
+        value=ANY_CATEGORY,
+        options=[ft.dropdown.Option(key=ANY_CATEGORY, text="Todas")] + [
+            ft.dropdown.Option(key=category, text=category)
+            for category in (phrase_bank.categories if phrase_bank else [])
+        ],
+    )
+    
+    # Difficulty level, only shown when the phrase bank was scored (see difficulty.py)
+    levels = phrase_bank.levels if phrase_bank else []
+    level_dropdown = ft.Dropdown(
+        label="Dificultad",
+        width=150,
+        value=ANY_CATEGORY,
+        options=[ft.dropdown.Option(key=ANY_CATEGORY, text="Todas")] + [
+            ft.dropdown.Option(key=level, text=level) for level in levels
+        ],
+        visible=bool(levels),
     )
     
-    # Button to solve the entire puzzle
-    solve_button = ft.ElevatedButton(
-        text="Resolver",
-        on_click=reveal_all_letters,
+    random_button = ft.ElevatedButton(
+        text="Aleatoria",
+        on_click=create_random_panel,
         style=ft.ButtonStyle(
             color=ft.Colors.WHITE,
-            bgcolor=ft.Colors.RED_700,
+            bgcolor=ft.Colors.INDIGO,
         ),
-        icon=ft.Icons.AUTO_AWESOME
+        icon=ft.Icons.SHUFFLE
     )
     
     # Container for initial setup (phrase input and start button)
@@ -444,19 +910,23 @@ def main(page: ft.Page):
         content=ft.Column([
             ft.Row([phrase_input], alignment=ft.MainAxisAlignment.CENTER),
             ft.Row([start_button], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row([room_input, watch_button], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row(
+                [category_dropdown, level_dropdown, random_button],
+                alignment=ft.MainAxisAlignment.CENTER,
+                visible=phrase_bank is not None,
+            ),
         ], spacing=10),
         visible=True,
     )
     
-    # Container for guessing (letter input, guess button, and solve button)
-    guess_container = ft.Container(
-        content=ft.Row([
-            guess_input,
-            guess_button,
-            solve_button  # Added the solve button here
-        ], alignment=ft.MainAxisAlignment.CENTER, spacing=10),
-        visible=False,
-    )
+    # Container for guessing, filled by build_guess_controls() with the first panel
+    guess_container = ft.Container(visible=False)
+    guess_input = guess_button = solve_button = auto_reveal_switch = next_random_button = None
+    keyboard_switch = renderer_switch = hints_text = None
+    wheel_row = turn_text = score_text = None
+    letter_keys = []
+    board_mask = 0  # Letters shown as guessed on the alphabet board
     
     # Container for the panel of letters - made responsive with expand
     panel_container = ft.Container(
@@ -486,6 +956,7 @@ def main(page: ft.Page):
                 ft.Container(padding=10),
                 setup_container,
                 guess_container,
+                ft.Row([watching_text], alignment=ft.MainAxisAlignment.CENTER),
                 ft.Divider(height=20, color=ft.Colors.BLUE_200),
                 panel_container,
                 ft.Container(
@@ -502,7 +973,9 @@ def main(page: ft.Page):
     )
 
     # Make responsive without using window_width
-    def page_resize(e):
+    last_input_width = phrase_input.width
+    
+    async def page_resize(e):
         # Use available width to determine the phrase input width
         if hasattr(e, "control") and hasattr(e.control, "width"):
             available_width = e.control.width
@@ -512,30 +985,107 @@ def main(page: ft.Page):
                 phrase_input.width = 400
         
         # Update the panel to better fit the screen
-        nonlocal letter_width, max_chars_per_row
+        nonlocal letter_width, max_chars_per_row, last_input_width
         
         # Adjust max chars based on mobile vs desktop
         is_mobile = phrase_input.width < 400
         
         # Simpler responsive approach
-        letter_width = 35 if is_mobile else 40
-        max_chars_per_row = 8 if is_mobile else 12
+        new_letter_width = 35 if is_mobile else 40
+        new_max_chars_per_row = 8 if is_mobile else 12
+        
+        # A drag-resize fires a burst of events but the layout only changes at the
+        # mobile/desktop breakpoint, so events that change nothing are coalesced away
+        if (phrase_input.width == last_input_width
+                and new_letter_width == letter_width
+                and new_max_chars_per_row == max_chars_per_row):
+            return
+        if phrase_input.width != last_input_width:
+            last_input_width = phrase_input.width
+            updates.mark(phrase_input)
+        
+        # Re-layout the existing cells, keeping their revealed/pending state
+        if panel_state and panel_container.content:
+            if new_letter_width != letter_width:
+                letter_width = new_letter_width
+                resize_cells()
+            if new_max_chars_per_row != max_chars_per_row:
+                max_chars_per_row = new_max_chars_per_row
+                layout_panel()
         
-        # If we have a panel and need to recreate it, do it here
-        if original_phrase and panel_container.content:
-            create_panel(None)
+        letter_width = new_letter_width
+        max_chars_per_row = new_max_chars_per_row
             
-        page.update()
+        updates.flush()
     
     # Skip window_width for responsiveness - let the layout adapt naturally
-    page.on_resize = page_resize
+    page.on_resize = instrument("page_resize", page_resize)
     
     # Handle keyboard shortcuts for guessing
-    def on_keyboard(e: ft.KeyboardEvent):
-        if e.key == "Return" and guess_container.visible:
-            guess_letter(None)
+    async def on_keyboard(e: ft.KeyboardEvent):
+        # Ctrl+Shift+D shows the hidden instrumentation overlay
+        if handler_stats and e.ctrl and e.shift and e.key == "D":
+            toggle_debug_overlay()
+            return
+        if not guess_container.visible:
+            return
+        if keyboard_switch.value:
+            if not (e.ctrl or e.alt or e.meta):
+                await guess_key(e.key)
+        elif e.key == "Return":
+            await guess_letter(None)
             
-    page.on_keyboard_event = on_keyboard
+    page.on_keyboard_event = instrument("on_keyboard", on_keyboard)
+    
+    # Hidden overlay with the rolling handler stats, only built when instrumentation is on
+    if handler_stats:
+        debug_text = ft.Text(font_family="monospace", size=12, selectable=True)
+        debug_saved = ft.Text(size=12, color=ft.Colors.BLUE_GREY_700)
+        
+        def refresh_debug_overlay():
+            if debug_overlay.visible:
+                debug_text.value = handler_stats.report()
+                updates.mark(debug_text)
+                updates.flush()
+        
+        def toggle_debug_overlay():
+            debug_overlay.visible = not debug_overlay.visible
+            debug_text.value = handler_stats.report()
+            updates.mark(debug_overlay)
+            updates.flush()
+        
+        def save_debug_json(e):
+            debug_saved.value = handler_stats.dump()
+            updates.mark(debug_saved)
+            updates.flush()
+        
+        debug_overlay = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("Instrumentación", weight=ft.FontWeight.BOLD),
+                    ft.TextButton("Guardar JSON", on_click=save_debug_json),
+                ]),
+                debug_text,
+                debug_saved,
+            ], spacing=5, tight=True),
+            bgcolor="#FFFFFFEE",
+            border=ft.border.all(1, ft.Colors.BLUE_GREY_300),
+            border_radius=8,
+            padding=10,
+            right=10,
+            top=10,
+            visible=False,
+        )
+        page.overlay.append(debug_overlay)
+        handler_stats.on_record = refresh_debug_overlay
+        
+        # Keep the stats (and the cProfile file) when the session ends
+        page.on_close = lambda e: handler_stats.dump()
+    
     page.update()
+    
+    # Bring back the game in progress once the page is on screen
+    page.run_task(resume_snapshot)
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
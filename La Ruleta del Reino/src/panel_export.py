@@ -0,0 +1,285 @@
+# Batch export of panels to SVG or PNG images, for printed worksheets.
+#
+# Every phrase of the input files (JSON, CSV or text, as in phrase_bank.py)
+# is laid out like in the app (panel_state.layout_rows and cell_boxes) and
+# drawn with the cell styles of cells.py, blank or with some letters
+# revealed. Phrases are rendered in batches on a process pool and the images
+# are written as they come back, to a folder or a zip file, so batches of any
+# size stream through.
+#
+#   python src/panel_export.py frases.csv -o fichas/
+#   python src/panel_export.py frases.csv -o fichas.zip --reveal "" --reveal AEIOU
+#   python src/panel_export.py frases.csv -o fichas.zip --format png --scale 2
+#
+# PNG needs Pillow (pip install pillow); SVG only needs the standard library.
+import os
+import re
+import unicodedata
+from xml.sax.saxutils import escape
+
+from batch_pool import map_batches
+from panel_state import REVEALED, SPECIAL, PanelState, cell_boxes, layout_rows
+
+BATCH_SIZE = 100
+PADDING = 10  # Blank space around the panel
+
+# Hex values of the Flet named colors used by the cell styles
+NAMED_COLORS = {
+    "white": "#FFFFFF",
+    "black": "#000000",
+    "blue800": "#1565C0",
+    "bluegrey300": "#90A4AE",
+    "transparent": None,
+}
+
+# Plain-data cell looks per state (see cell_looks), set by the pool initializer
+# in workers and on first use otherwise
+_looks = None
+
+
+def _hex(color):
+    color = getattr(color, "value", color)
+    return NAMED_COLORS.get(color, color)
+
+
+# The cell styles of cells.py as plain data that worker processes can take
+# without importing Flet: state -> (fill, border color, border width,
+# radius, shadow (color, blur, spread, dx, dy) or None)
+def cell_looks():
+    from cells import CELL_STYLES
+
+    looks = {}
+    for state, style in CELL_STYLES.items():
+        shadow = style.shadow
+        looks[state] = (
+            _hex(style.bgcolor),
+            _hex(style.border.top.color) if style.border else None,
+            style.border.top.width if style.border else 0,
+            style.border_radius or 0,
+            (_hex(shadow.color), shadow.blur_radius, shadow.spread_radius, shadow.offset.x, shadow.offset.y)
+            if shadow else None,
+        )
+    return looks
+
+
+def _init_worker(looks):
+    global _looks
+    _looks = looks
+
+
+def _cell_looks():
+    global _looks
+    if _looks is None:
+        _looks = cell_looks()
+    return _looks
+
+
+# Game state of a worksheet panel: the letters given are revealed
+def worksheet_state(phrase, reveal=""):
+    state = PanelState(phrase)
+    for letter in reveal:
+        state.guess(letter)
+    while state.reveal_next() is not None:
+        pass
+    return state
+
+
+def render_svg(state, max_chars_per_row, letter_width):
+    looks = _cell_looks()
+    width, height, boxes = cell_boxes(state.states, layout_rows(state.phrase, max_chars_per_row), letter_width)
+    cell_height = letter_width * 1.5
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width + 2 * PADDING:g}" '
+        f'height="{height + 2 * PADDING:g}" viewBox="{-PADDING} {-PADDING} '
+        f'{width + 2 * PADDING:g} {height + 2 * PADDING:g}">'
+    ]
+    # One drop shadow filter per shadow style
+    filters = {}
+    for _, _, _, _, shadow in looks.values():
+        if shadow and shadow not in filters:
+            filters[shadow] = f"s{len(filters)}"
+    for (color, blur, _, dx, dy), name in filters.items():
+        parts.append(
+            f'<filter id="{name}" x="-50%" y="-50%" width="200%" height="200%">'
+            f'<feDropShadow dx="{dx}" dy="{dy}" stdDeviation="{blur / 2:g}" flood-color="{color}"/></filter>'
+        )
+    font_size = int(letter_width * 0.6)
+    for index, box in enumerate(boxes):
+        if box is None:
+            continue
+        x, y = box
+        fill, border, border_width, radius, shadow = looks[state.states[index]]
+        shadow_filter = f' filter="url(#{filters[shadow]})"' if shadow else ""
+        stroke = f' stroke="{border}" stroke-width="{border_width}"' if border else ""
+        parts.append(
+            f'<rect x="{x:g}" y="{y:g}" width="{letter_width}" height="{cell_height:g}" rx="{radius}" '
+            f'fill="{fill or "none"}"{stroke}{shadow_filter}/>'
+        )
+        if state.states[index] == REVEALED or state.states[index] == SPECIAL:
+            parts.append(
+                f'<text x="{x + letter_width / 2:g}" y="{y + cell_height / 2:g}" text-anchor="middle" '
+                f'dominant-baseline="central" font-family="sans-serif" font-weight="bold" '
+                f'font-size="{font_size}" fill="#000000">{escape(state.phrase[index])}</text>'
+            )
+    parts.append("</svg>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def _font(size):
+    from PIL import ImageFont
+
+    for name in ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size)
+
+
+def render_png(state, max_chars_per_row, letter_width, scale=1):
+    from io import BytesIO
+    from PIL import Image, ImageDraw, ImageFilter
+
+    looks = _cell_looks()
+    letter_width *= scale
+    width, height, boxes = cell_boxes(state.states, layout_rows(state.phrase, max_chars_per_row), letter_width)
+    padding = PADDING * scale
+    cell_height = letter_width * 1.5
+    size = (int(width + 2 * padding), int(height + 2 * padding))
+
+    # Shadows are drawn on their own layer and blurred once for the whole panel
+    shadows = Image.new("RGBA", size, (255, 255, 255, 0))
+    shadow_draw = ImageDraw.Draw(shadows)
+    blur = 0
+    for index, box in enumerate(boxes):
+        shadow = box and looks[state.states[index]][4]
+        if shadow:
+            color, shadow_blur, spread, dx, dy = shadow
+            x, y = box[0] + padding + dx * scale, box[1] + padding + dy * scale
+            shadow_draw.rounded_rectangle(
+                (x - spread, y - spread, x + letter_width + spread, y + cell_height + spread),
+                radius=looks[state.states[index]][3] * scale, fill=color,
+            )
+            blur = max(blur, shadow_blur * scale / 2)
+    image = Image.new("RGBA", size, (255, 255, 255, 255))
+    image.alpha_composite(shadows.filter(ImageFilter.GaussianBlur(blur)) if blur else shadows)
+
+    draw = ImageDraw.Draw(image)
+    font = _font(int(letter_width * 0.6))
+    for index, box in enumerate(boxes):
+        if box is None:
+            continue
+        fill, border, border_width, radius, _ = looks[state.states[index]]
+        x, y = box[0] + padding, box[1] + padding
+        draw.rounded_rectangle(
+            (x, y, x + letter_width, y + cell_height), radius=radius * scale,
+            fill=fill, outline=border, width=border_width * scale,
+        )
+        if state.states[index] == REVEALED or state.states[index] == SPECIAL:
+            draw.text((x + letter_width / 2, y + cell_height / 2), state.phrase[index],
+                      fill="#000000", font=font, anchor="mm")
+
+    output = BytesIO()
+    image.convert("RGB").save(output, "PNG", optimize=False)
+    return output.getvalue()
+
+
+# File name for a phrase: its number and the start of the phrase without accents
+def file_name(number, phrase, reveal, extension):
+    suffix = f"-{_slug(reveal)}" if reveal else ""
+    return f"{number:05d}-{_slug(phrase)[:40].strip('-')}{suffix}.{extension}"
+
+
+def _slug(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+# Render a batch of (number, phrase) pairs in a worker; returns (name, bytes) pairs
+def render_batch(batch, reveals, image_format, max_chars_per_row, letter_width, scale):
+    images = []
+    for number, phrase in batch:
+        for reveal in reveals:
+            state = worksheet_state(phrase, reveal)
+            if image_format == "png":
+                data = render_png(state, max_chars_per_row, letter_width, scale)
+            else:
+                data = render_svg(state, max_chars_per_row, letter_width)
+            images.append((file_name(number, state.phrase, reveal, image_format), data))
+    return images
+
+
+# Render phrases on a process pool, yielding (name, bytes) per image in input
+# order. Only a few batches per worker are in flight at a time.
+def render_phrases(phrases, reveals=("",), image_format="svg", max_chars_per_row=12,
+                   letter_width=40, scale=1, workers=None, batch_size=BATCH_SIZE):
+    options = (reveals, image_format, max_chars_per_row, letter_width, scale)
+    numbered = ((number, phrase) for number, phrase in enumerate(phrases, 1) if phrase.strip())
+    yield from map_batches(render_batch, numbered, batch_size, options, workers,
+                           initializer=_init_worker, initargs=(cell_looks(),))
+
+
+# Write images to a folder, or to a zip file if the output ends in .zip.
+# Returns the number of images written.
+def write_images(images, output):
+    count = 0
+    if output.lower().endswith(".zip"):
+        import zipfile
+
+        with zipfile.ZipFile(output, "w") as archive:
+            for name, data in images:
+                # PNG is compressed already
+                compression = zipfile.ZIP_STORED if name.endswith(".png") else zipfile.ZIP_DEFLATED
+                archive.writestr(name, data, compress_type=compression)
+                count += 1
+        return count
+
+    os.makedirs(output, exist_ok=True)
+    for name, data in images:
+        with open(os.path.join(output, name), "wb") as f:
+            f.write(data)
+        count += 1
+    return count
+
+
+def main():
+    import argparse
+    import time
+
+    from phrase_bank import read_phrases
+
+    parser = argparse.ArgumentParser(description="Export panels to SVG or PNG images for worksheets")
+    parser.add_argument("sources", nargs="+", help="JSON, CSV or text files with phrases")
+    parser.add_argument("-o", "--output", required=True, help="folder or .zip file to write")
+    parser.add_argument("--format", choices=("svg", "png"), default="svg", help="image format (PNG needs Pillow)")
+    parser.add_argument("--reveal", action="append",
+                        help="letters shown on the panel, one image per --reveal (default: blank panel)")
+    parser.add_argument("--columns", type=int, default=12, help="cells per row")
+    parser.add_argument("--letter-width", type=int, default=40, help="cell width in pixels")
+    parser.add_argument("--scale", type=int, default=1, help="PNG pixels per panel pixel")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="phrases per task")
+    args = parser.parse_args()
+
+    if args.format == "png":
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            parser.error("PNG export needs Pillow: pip install pillow")
+
+    def phrases():
+        for source in args.sources:
+            for phrase, _ in read_phrases(source):
+                yield phrase
+
+    start = time.perf_counter()
+    images = render_phrases(
+        phrases(), tuple(args.reveal or ("",)), args.format, args.columns,
+        args.letter_width, args.scale, args.workers, args.batch_size,
+    )
+    count = write_images(images, args.output)
+    print(f"{count} images in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import os
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+# Cell states stored in the PanelState bitmap (one byte per cell)
+HIDDEN = 0    # Letter not guessed yet
+PENDING = 1   # Letter guessed and highlighted, waiting for "Siguiente"
+REVEALED = 2  # Letter shown on the panel
+SPACE = 3     # Gap between words
+SPECIAL = 4   # Punctuation, shown from the start
+
+
+# Helper function to normalize Spanish letters (remove accents for comparison)
+def normalize_letter(letter):
+    # Normalize to NFD form to separate base character and accent
+    normalized = unicodedata.normalize('NFD', letter)
+    # Keep only the base character (removing combining marks)
+    base_letter = ''.join([c for c in normalized if not unicodedata.combining(c)])
+    # Special case for ñ which should remain ñ (not n)
+    if letter.lower() == 'ñ':
+        return 'ñ'
+    return base_letter
+
+
+# Normalized Spanish alphabet, one bit per letter in letter masks
+ALPHABET = "ABCDEFGHIJKLMNñOPQRSTUVWXYZ"
+LETTER_BITS = {letter: 1 << bit for bit, letter in enumerate(ALPHABET)}
+
+
+# Bit of a single letter in letter masks (accents ignored), 0 for anything
+# else (keys like "Enter", digits, symbols)
+def letter_bit(letter):
+    if len(letter) != 1:
+        return 0
+    return LETTER_BITS.get(normalize_letter(letter.upper()), 0)
+
+
+# Whether a character can be guessed: a letter or a digit, like the cells
+# that are neither spaces nor punctuation
+def guessable(char):
+    return len(char) == 1 and char.isalnum()
+
+
+# Bitmask of the letters in a phrase (accents ignored, digits and symbols skipped)
+def letter_mask(phrase):
+    mask = 0
+    for char in set(phrase.upper()):
+        mask |= LETTER_BITS.get(normalize_letter(char), 0)
+    return mask
+
+
+# Split a phrase into panel rows without breaking words when possible.
+# Returns a list of ranges over the cells of ' '.join(phrase.split()),
+# one range per row (spaces between words are cells too).
+def wrap_phrase(phrase, max_chars_per_row):
+    words = phrase.split()
+    rows = []
+    row_start = 0
+    chars_in_row = 0
+    index = 0  # Cell index in the joined phrase
+
+    i = 0
+    while i < len(words):
+        word = words[i]
+
+        # Check if this word would exceed the line width
+        if chars_in_row + len(word) > max_chars_per_row:
+            # If the word alone exceeds the max width, it must be split across lines
+            if chars_in_row == 0:
+                for j in range(len(word)):
+                    index += 1
+                    chars_in_row += 1
+
+                    # Start a new row if needed
+                    if chars_in_row >= max_chars_per_row and j < len(word) - 1:
+                        rows.append(range(row_start, index))
+                        row_start = index
+                        chars_in_row = 0
+
+                # Add a space after the word (unless it's the last word)
+                if i < len(words) - 1:
+                    index += 1
+                    chars_in_row += 1
+            else:
+                # If we already have content on this line, start a new line
+                rows.append(range(row_start, index))
+                row_start = index
+                chars_in_row = 0
+                # Don't increment i, we'll process this word on the new line
+                continue
+        else:
+            index += len(word)
+            chars_in_row += len(word)
+
+            # Add a space after the word (unless it's the last word)
+            if i < len(words) - 1:
+                index += 1
+                chars_in_row += 1
+
+        i += 1
+
+    # Add the last row if it has any cells
+    if index > row_start:
+        rows.append(range(row_start, index))
+
+    return rows
+
+
+# Rows on the board, used to center panels with fewer rows vertically
+BOARD_ROWS = 4
+
+
+# Row widths of the board, top to bottom: "flat" has rows of the same width,
+# "show" is shaped like the TV board, with the top and bottom rows 2 cells shorter
+def board_capacities(max_chars_per_row, shape="flat"):
+    if shape == "show":
+        edge = max(max_chars_per_row - 2, 1)
+        return (edge,) + (max_chars_per_row,) * (BOARD_ROWS - 2) + (edge,)
+    return (max_chars_per_row,) * BOARD_ROWS
+
+
+# Split a phrase into rows with the least raggedness: the fewest rows that fit
+# the board, with the least sum of the squared empty cells of each row. For
+# each row count, dynamic programming over the words finds the best breaks for
+# the widths of the rows it would take, centered vertically on the board
+# (panels taller than the board, or that do not fit its shape, get rows as
+# wide as its widest). Rows are ranges like those of wrap_phrase, without the
+# spaces where the phrase breaks; phrases with words too long for any row
+# are left to wrap_phrase (its rows trimmed the same way).
+def balanced_rows(phrase, board):
+    words = phrase.split()
+    widest = max(board)
+    if not words or max(len(word) for word in words) > widest:
+        return _trim_spaces(phrase, wrap_phrase(phrase, widest))
+
+    starts = []  # Cell index of each word in the joined phrase
+    index = 0
+    for word in words:
+        starts.append(index)
+        index += len(word) + 1
+
+    # wrap_phrase never uses fewer rows than needed at the widest width
+    for count in range(len(wrap_phrase(phrase, widest)), len(words) + 1):
+        best = None
+        if count > len(board):
+            offsets = [None]
+        else:
+            offsets = sorted({(len(board) - count) // 2, (len(board) - count + 1) // 2})
+        for offset in offsets:
+            capacities = (widest,) * count if offset is None else board[offset:offset + count]
+            layout = _best_breaks(words, capacities)
+            if layout and (best is None or layout[0] < best[0]):
+                best = layout
+        if best:
+            breaks = best[1]
+            return [
+                range(starts[first], starts[last - 1] + len(words[last - 1]))
+                for first, last in zip(breaks, breaks[1:])
+            ]
+    # Words too long for the shorter rows whichever way they go: rows all as wide as the widest
+    return balanced_rows(phrase, (widest,) * len(board))
+
+
+# Rows without the spaces at their ends, which wrap_phrase keeps
+def _trim_spaces(phrase, rows):
+    text = ' '.join(phrase.split())
+    trimmed = []
+    for cell_range in rows:
+        start, stop = cell_range.start, cell_range.stop
+        while start < stop and text[start] == ' ':
+            start += 1
+        while stop > start and text[stop - 1] == ' ':
+            stop -= 1
+        trimmed.append(range(start, stop))
+    return trimmed
+
+
+# Least raggedness of the words in exactly len(capacities) rows, as (cost,
+# word indices where each row starts plus len(words)), or None if they do not fit
+def _best_breaks(words, capacities):
+    rows = len(capacities)
+    infinity = float("inf")
+    # cost[row][word]: least cost of words[word:] in rows[row:]; row_end[row][word]: where that row ends
+    cost = [[infinity] * (len(words) + 1) for _ in range(rows + 1)]
+    row_end = [[0] * (len(words) + 1) for _ in range(rows)]
+    cost[rows][len(words)] = 0
+    for row in range(rows - 1, -1, -1):
+        capacity = capacities[row]
+        remaining_rows = rows - row - 1
+        for first in range(len(words) - remaining_rows - 1, -1, -1):
+            width = -1
+            for last in range(first + 1, len(words) - remaining_rows + 1):
+                width += len(words[last - 1]) + 1
+                if width > capacity:
+                    break
+                rest = cost[row + 1][last]
+                if rest == infinity:
+                    continue
+                total = (capacity - width) ** 2 + rest
+                if total < cost[row][first]:
+                    cost[row][first] = total
+                    row_end[row][first] = last
+    if cost[0][0] == infinity:
+        return None
+    breaks = [0]
+    for row in range(rows):
+        breaks.append(row_end[row][breaks[-1]])
+    return cost[0][0], breaks
+
+
+# Line breaking engines: engine(phrase, board capacities) -> row ranges.
+# "greedy" is the original word wrap at the widest row.
+LAYOUT_ENGINES = {
+    "greedy": lambda phrase, board: wrap_phrase(phrase, max(board)),
+    "balanced": balanced_rows,
+}
+LAYOUT_ENGINE = os.environ.get("RULETA_LAYOUT", "balanced")
+BOARD_SHAPE = os.environ.get("RULETA_BOARD", "flat")
+
+
+# Cached layout of a phrase at a given row width, board shape and engine.
+# Resizing only switches between a couple of widths, so re-layouts hit the cache.
+@lru_cache(maxsize=1024)
+def layout_rows(phrase, max_chars_per_row, engine=None, shape=None):
+    board = board_capacities(max_chars_per_row, shape or BOARD_SHAPE)
+    return tuple(LAYOUT_ENGINES[engine or LAYOUT_ENGINE](phrase, board))
+
+
+# Panel geometry shared by the renderers: margin around a cell, spacing
+# between the cells of a row and between rows (see cells.new_cell)
+CELL_MARGIN = 2
+CELL_SPACING = 2
+ROW_SPACING = 10
+
+
+# Place the cells of a panel for its rows (see layout_rows), centering each
+# row like the Row controls do. Returns the panel width and height and the
+# (x, y) of every cell, None for spaces. Cells are letter_width wide and 1.5 times as tall.
+def cell_boxes(states, rows, letter_width):
+    box_width = letter_width + 2 * CELL_MARGIN
+    box_height = letter_width * 1.5 + 2 * CELL_MARGIN
+    widest = max((len(cell_range) for cell_range in rows), default=0)
+    width = widest * box_width + max(widest - 1, 0) * CELL_SPACING
+    height = len(rows) * box_height + max(len(rows) - 1, 0) * ROW_SPACING
+
+    boxes = [None] * len(states)
+    for row, cell_range in enumerate(rows):
+        row_width = len(cell_range) * box_width + (len(cell_range) - 1) * CELL_SPACING
+        left = (width - row_width) / 2 + CELL_MARGIN
+        top = row * (box_height + ROW_SPACING) + CELL_MARGIN
+        for column, index in enumerate(cell_range):
+            if states[index] != SPACE:
+                boxes[index] = (left + column * (box_width + CELL_SPACING), top)
+    return width, height, boxes
+
+
+# UI-independent game state for one panel.
+# Everything that depends on the phrase (normalization, letter positions) is
+# computed once here, so guesses and reveals only touch the cells that change.
+class PanelState:
+    def __init__(self, phrase):
+        # The panel shows words separated by a single space cell
+        self.phrase = ' '.join(phrase.upper().split())
+        self.normalized = [normalize_letter(char) for char in self.phrase]
+
+        # Compact per-cell state and the queue of cells waiting for "Siguiente"
+        self.states = bytearray(len(self.phrase))
+        self.pending = deque()
+        self.guessed = 0  # Mask of the letters guessed so far (see LETTER_BITS)
+        self.letters = letter_mask(self.phrase)  # Mask of the letters in the phrase
+
+        # Map from normalized letter to the cells holding it
+        self.positions = {}
+        for index, char in enumerate(self.phrase):
+            if char == ' ':
+                self.states[index] = SPACE
+            elif not char.isalnum():
+                self.states[index] = SPECIAL
+            else:
+                self.positions.setdefault(self.normalized[index], []).append(index)
+
+    def __len__(self):
+        return len(self.phrase)
+
+    @property
+    def has_pending(self):
+        return bool(self.pending)
+
+    # Every letter is shown: no cell is hidden or waiting for "Siguiente"
+    @property
+    def solved(self):
+        return HIDDEN not in self.states and PENDING not in self.states
+
+    # Mark every hidden cell matching the letter as pending and return them.
+    # A letter guessed before or not in the phrase returns at once.
+    def guess(self, letter):
+        key = normalize_letter(letter.upper())
+        bit = LETTER_BITS.get(key, 0)
+        if bit & self.guessed or bit & ~self.letters:
+            self.guessed |= bit
+            return []
+        self.guessed |= bit
+        matches = []
+        for index in self.positions.get(key, ()):
+            if self.states[index] == HIDDEN:
+                self.states[index] = PENDING
+                matches.append(index)
+        self.pending.extend(matches)
+        return matches
+
+    # Whether guessing a character again would change nothing: a letter in the
+    # guessed mask, or a digit (not in the masks) with none of its cells hidden
+    def guessed_before(self, char):
+        key = normalize_letter(char.upper())
+        bit = LETTER_BITS.get(key, 0)
+        if bit:
+            return bool(self.guessed & bit)
+        cells = self.positions.get(key)
+        return bool(cells) and all(self.states[index] != HIDDEN for index in cells)
+
+    # Reveal the next pending cell, returns its index or None
+    def reveal_next(self):
+        if not self.pending:
+            return None
+        index = self.pending.popleft()
+        self.states[index] = REVEALED
+        return index
+
+    # Reveal every hidden or pending cell and return them
+    def reveal_all(self):
+        revealed = [
+            index for index, state in enumerate(self.states)
+            if state == HIDDEN or state == PENDING
+        ]
+        for index in revealed:
+            self.states[index] = REVEALED
+        self.pending.clear()
+        return revealed
+
+    # Apply a state change made elsewhere (a presenter's deltas) to the given
+    # cells, keeping the pending queue in step
+    def apply(self, indices, state):
+        for index in indices:
+            self.states[index] = state
+        if state == PENDING:
+            self.pending.extend(indices)
+        elif self.pending:
+            # Reveals usually come in queue order
+            done = set(indices)
+            while self.pending and self.pending[0] in done:
+                self.pending.popleft()
+            if any(index in done for index in self.pending):
+                self.pending = deque(index for index in self.pending if index not in done)
+
+    # Restore the cell states and pending queue of a panel in progress
+    def restore(self, states, pending=()):
+        if len(states) != len(self.states):
+            raise ValueError(f"expected {len(self.states)} cell states, got {len(states)}")
+        self.states[:] = states
+        self.pending = deque(pending)
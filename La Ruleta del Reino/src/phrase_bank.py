@@ -0,0 +1,311 @@
+# Indexed phrase bank: large phrase libraries with categories, stored in a
+# compact binary index that is memory-mapped when opened.
+#
+# For every phrase the index keeps how it wraps at each panel width used by
+# create_panel (rows, see panel_state.layout_rows), its longest word and its
+# letter set. Phrase ids are stored sorted by row count per category and
+# width, with a cumulative count per row number, so "a random phrase of
+# category X that fits in R rows" is a prefix of one array: constant time.
+#
+# Build an index from JSON, CSV or plain text files:
+#   python src/phrase_bank.py frases.csv refranes.txt -o src/assets/frases.rrpb
+# or with difficulty scores and levels (see difficulty.py):
+#   python src/difficulty.py frases.csv refranes.txt -o src/assets/frases.rrpb
+import json
+import os
+import random
+from array import array
+from functools import lru_cache
+
+from index_file import open_index, section_view, write_index
+from panel_state import layout_rows, letter_mask
+
+MAGIC = b"RRPB0001"
+LAYOUT_WIDTHS = (8, 12)  # max_chars_per_row for the mobile and desktop layouts
+MAX_ROWS = 63            # Row counts above this are stored as MAX_ROWS
+ALL_CATEGORIES = ""      # Category key used for "any category"
+
+# Difficulty levels of scored phrases: scores (0-100) below each limit get
+# that level, the rest get the last one
+DIFFICULTY_LEVELS = ("Fácil", "Media", "Difícil")
+DIFFICULTY_LIMITS = (35, 55)
+
+
+def difficulty_level(score):
+    for level, limit in zip(DIFFICULTY_LEVELS, DIFFICULTY_LIMITS):
+        if score < limit:
+            return level
+    return DIFFICULTY_LEVELS[-1]
+
+
+# Name of the group of phrase ids of a category, or of a category and level
+def _group_name(category, level=None):
+    return category if level is None else f"{category}|{level}"
+
+
+# Read (phrase, category) pairs from a JSON, CSV or plain text file.
+# JSON: a list of phrases, a list of {"frase"/"phrase", "categoria"/"category"}
+#   objects, or an object mapping each category to its list of phrases.
+# CSV: "frase"/"phrase" and "categoria"/"category" columns, or phrase and
+#   category as the first two columns when there is no header.
+# Text: one phrase per line, "[Categoría]" lines start a category, "#" comments.
+# Phrases without a category get the file name as their category.
+def read_phrases(path):
+    default_category = os.path.splitext(os.path.basename(path))[0]
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for category, phrases in data.items():
+                for phrase in phrases:
+                    yield phrase, category
+        else:
+            for entry in data:
+                if isinstance(entry, str):
+                    yield entry, default_category
+                else:
+                    phrase = entry.get("frase", entry.get("phrase", ""))
+                    category = entry.get("categoria", entry.get("category")) or default_category
+                    yield phrase, category
+
+    elif extension == ".csv":
+        import csv  # Only needed to build an index, not to open one
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = csv.reader(f)
+            first_row = next(rows, [])
+            header = [column.strip().lower() for column in first_row]
+            if "frase" in header or "phrase" in header:
+                phrase_column = header.index("frase" if "frase" in header else "phrase")
+                category_column = next(
+                    (header.index(name) for name in ("categoria", "categoría", "category") if name in header),
+                    None,
+                )
+            else:
+                # No header, the first row is data
+                phrase_column, category_column = 0, 1
+                rows = [first_row] + list(rows)
+            for row in rows:
+                if len(row) <= phrase_column:
+                    continue
+                category = default_category
+                if category_column is not None and len(row) > category_column and row[category_column].strip():
+                    category = row[category_column].strip()
+                yield row[phrase_column], category
+
+    else:
+        category = default_category
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("[") and line.endswith("]"):
+                    category = line[1:-1].strip() or default_category
+                    continue
+                yield line, category
+
+
+# What the index keeps about how a phrase is laid out: its letter mask and
+# its row count at each of LAYOUT_WIDTHS. Takes a phrase as build_index stores
+# it (upper case, single spaces).
+def phrase_layout(phrase):
+    return letter_mask(phrase), tuple(len(layout_rows(phrase, width)) for width in LAYOUT_WIDTHS)
+
+
+# Build the index file from (phrase, category) pairs, or (phrase, category,
+# difficulty score) triples for a scored index; returns the phrase count.
+# A fourth item, the phrase_layout() of the phrase, saves computing it here
+# (difficulty.py computes it in its worker processes).
+def build_index(entries, path):
+    phrases = []
+    categories = {}
+    category_ids = array("H")
+    difficulties = array("B")
+    layouts = []
+    for entry in entries:
+        phrase = " ".join(str(entry[0]).upper().split())
+        if not phrase:
+            continue
+        phrases.append(phrase)
+        category_ids.append(categories.setdefault(str(entry[1]).strip(), len(categories)))
+        if len(entry) > 2:
+            difficulties.append(max(0, min(100, round(entry[2]))))
+        layouts.append(entry[3] if len(entry) > 3 else phrase_layout(phrase))
+    if difficulties and len(difficulties) != len(phrases):
+        raise ValueError("either every phrase or none has a difficulty score")
+
+    text = bytearray()
+    text_offsets = array("I", [0])
+    longest_word = array("B")
+    letters = array("I")
+    rows = {width: array("B") for width in LAYOUT_WIDTHS}
+    for phrase, (mask, row_counts) in zip(phrases, layouts):
+        text += phrase.encode("utf-8")
+        text_offsets.append(len(text))
+        longest_word.append(min(max(len(word) for word in phrase.split()), 255))
+        letters.append(mask)
+        for width, row_count in zip(LAYOUT_WIDTHS, row_counts):
+            rows[width].append(min(row_count, MAX_ROWS))
+
+    sections = {
+        "text": bytes(text),
+        "text_offsets": text_offsets,
+        "category": category_ids,
+        "longest_word": longest_word,
+        "letters": letters,
+    }
+    for width in LAYOUT_WIDTHS:
+        sections[f"rows_{width}"] = rows[width]
+    if difficulties:
+        sections["difficulty"] = difficulties
+
+    # Phrase ids sorted by rows, per category (and for all of them) and width,
+    # plus how many of them fit in 0..MAX_ROWS rows. Scored indexes also have
+    # a group per category and difficulty level.
+    groups = {ALL_CATEGORIES: range(len(phrases))}
+    members = {}
+    for index, category_id in enumerate(category_ids):
+        members.setdefault(category_id, []).append(index)
+    for name, category_id in categories.items():
+        groups[name] = members.get(category_id, [])
+    if difficulties:
+        for name in list(groups):
+            for level in DIFFICULTY_LEVELS:
+                groups[_group_name(name, level)] = [
+                    index for index in groups[name] if difficulty_level(difficulties[index]) == level
+                ]
+    group_keys = {}
+    for key_number, (name, ids) in enumerate(groups.items()):
+        group_keys[name] = key_number
+        for width in LAYOUT_WIDTHS:
+            width_rows = rows[width]
+            ordered = sorted(ids, key=width_rows.__getitem__)
+            cumulative = array("I", [0] * (MAX_ROWS + 1))
+            for index in ordered:
+                cumulative[width_rows[index]] += 1
+            for row_count in range(1, MAX_ROWS + 1):
+                cumulative[row_count] += cumulative[row_count - 1]
+            sections[f"order_{key_number}_{width}"] = array("I", ordered)
+            sections[f"fits_{key_number}_{width}"] = cumulative
+
+    write_index(path, MAGIC, {
+        "count": len(phrases),
+        "categories": list(categories),
+        "groups": group_keys,
+        "widths": list(LAYOUT_WIDTHS),
+        "max_rows": MAX_ROWS,
+        "levels": list(DIFFICULTY_LEVELS) if difficulties else [],
+    }, sections)
+    return len(phrases)
+
+
+# Read-only view of an index file. Nothing is loaded up front: the file is
+# memory-mapped and arrays are read straight from the mapping when used.
+class PhraseBank:
+    def __init__(self, path):
+        self.path = path
+        self._map, header, self._data_start = open_index(path, MAGIC, "phrase bank index")
+
+        self.count = header["count"]
+        self.categories = header["categories"]
+        self.widths = tuple(header["widths"])
+        self.max_rows = header["max_rows"]
+        self.levels = header.get("levels", [])  # Empty unless the index is scored
+        self._groups = header["groups"]
+        self._layout = header["sections"]
+        self._sections = {}
+
+    def __len__(self):
+        return self.count
+
+    # Array view of a section, mapped on first use
+    def _section(self, name):
+        view = self._sections.get(name)
+        if view is None:
+            view = self._sections[name] = section_view(self._map, self._data_start, *self._layout[name])
+        return view
+
+    def phrase(self, index):
+        offsets = self._section("text_offsets")
+        return bytes(self._section("text")[offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def category(self, index):
+        return self.categories[self._section("category")[index]]
+
+    def rows(self, index, max_chars_per_row):
+        return self._section(f"rows_{max_chars_per_row}")[index]
+
+    def longest_word(self, index):
+        return self._section("longest_word")[index]
+
+    def letters(self, index):
+        return self._section("letters")[index]
+
+    # Difficulty score (0-100) of a phrase, None if the index is not scored
+    def difficulty(self, index):
+        return self._section("difficulty")[index] if self.levels else None
+
+    # Number of phrases of a category (and difficulty level) that fit in
+    # max_rows at this width
+    def count_fitting(self, category=ALL_CATEGORIES, max_rows=4, max_chars_per_row=12, level=None):
+        if max_chars_per_row not in self.widths:
+            raise ValueError(f"no layout for {max_chars_per_row} characters per row, "
+                             f"the index has {self.widths}")
+        group = self._groups.get(_group_name(category, level))
+        if group is None:
+            return 0
+        fits = self._section(f"fits_{group}_{max_chars_per_row}")
+        return fits[max(0, min(max_rows, self.max_rows))]
+
+    # Index of a random phrase of a category (and difficulty level) that fits in
+    # max_rows rows at this width, or None if there is none. Constant time: the
+    # fitting phrases are the first count_fitting() ids of the sorted order.
+    def random_index(self, category=ALL_CATEGORIES, max_rows=4, max_chars_per_row=12, rng=random,
+                     level=None):
+        fitting = self.count_fitting(category, max_rows, max_chars_per_row, level)
+        if not fitting:
+            return None
+        group = self._groups[_group_name(category, level)]
+        return self._section(f"order_{group}_{max_chars_per_row}")[rng.randrange(fitting)]
+
+    def random_phrase(self, category=ALL_CATEGORIES, max_rows=4, max_chars_per_row=12, rng=random,
+                      level=None):
+        index = self.random_index(category, max_rows, max_chars_per_row, rng, level)
+        return None if index is None else self.phrase(index)
+
+    def close(self):
+        self._sections.clear()
+        self._map.close()
+
+
+# Open an index once per process; sessions share the same mapping.
+# Returns None when the file does not exist.
+@lru_cache(maxsize=8)
+def open_phrase_bank(path):
+    if not path or not os.path.exists(path):
+        return None
+    return PhraseBank(path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a phrase bank index")
+    parser.add_argument("sources", nargs="+", help="JSON, CSV or text files with phrases")
+    parser.add_argument("-o", "--output", required=True, help="index file to write")
+    args = parser.parse_args()
+
+    def entries():
+        for source in args.sources:
+            yield from read_phrases(source)
+
+    count = build_index(entries(), args.output)
+    bank = PhraseBank(args.output)
+    print(f"{count} phrases in {len(bank.categories)} categories -> {args.output}")
+    bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import asyncio
+
+
+# Reveals the pending letters one tick at a time, like on the show, without
+# blocking the handler. The ticks run as an asyncio task on the page's event
+# loop, so other sessions on the same server keep being served in between.
+class RevealScheduler:
+    def __init__(self, tick, interval=0.8):
+        # tick() reveals the next cells and sends their updates in one batch;
+        # it returns False once there is nothing left to reveal
+        self.tick = tick
+        self.interval = interval  # Seconds between ticks
+        self.task = None
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    # Start revealing on the current event loop (call it from an async handler)
+    def start(self):
+        self.cancel()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    # Stop revealing; cells already revealed stay revealed
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                if not self.tick():
+                    break
+        except asyncio.CancelledError:
+            # Ticks never yield half way, so a cancelled reveal leaves no partial state
+            pass
+        finally:
+            if self.task is asyncio.current_task():
+                self.task = None
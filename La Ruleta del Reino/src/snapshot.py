@@ -0,0 +1,202 @@
+# Compact snapshots of a game in progress, so a dropped web client or a
+# restarted app resumes the panel where it was instead of replaying the round.
+#
+# A snapshot is a few bytes (little-endian):
+#   version   B
+#   phrase    H byte length + UTF-8 text
+#   guessed   I mask of the guessed letters (panel_state.LETTER_BITS)
+#   revealed  one bit per cell, (cells + 7) // 8 bytes
+#   pending   H count + H per cell, in reveal order
+# The client storage keeps it as URL-safe base64 text, a file keeps the bytes
+# (one file per device, named after an id kept in the device's client storage).
+# Restoring builds the PanelState in one pass over the bitmap; no guess is
+# replayed.
+import asyncio
+import base64
+import os
+import struct
+import uuid
+from collections import deque
+
+from panel_state import HIDDEN, PENDING, REVEALED, PanelState
+
+VERSION = 1
+STORAGE_KEY = "ruleta.partida"
+CLIENT_ID_KEY = "ruleta.cliente"
+
+# Directory to keep the snapshot in instead of the client storage
+SNAPSHOT_DIR = os.environ.get("RULETA_SNAPSHOT_DIR")
+
+
+def encode(state):
+    phrase = state.phrase.encode("utf-8")
+    revealed = bytearray((len(state) + 7) // 8)
+    for index, cell_state in enumerate(state.states):
+        if cell_state == REVEALED:
+            revealed[index >> 3] |= 1 << (index & 7)
+    pending = tuple(state.pending)
+    return b"".join((
+        struct.pack("<BH", VERSION, len(phrase)),
+        phrase,
+        struct.pack("<I", state.guessed),
+        revealed,
+        struct.pack(f"<H{len(pending)}H", len(pending), *pending),
+    ))
+
+
+# Rebuild the PanelState of a snapshot; raises ValueError if it is not one
+def decode(data):
+    try:
+        version, size = struct.unpack_from("<BH", data)
+        if version != VERSION:
+            raise ValueError(f"unknown snapshot version {version}")
+        offset = 3
+        state = PanelState(bytes(data[offset:offset + size]).decode("utf-8"))
+        offset += size
+        (state.guessed,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        revealed = data[offset:offset + (len(state) + 7) // 8]
+        offset += (len(state) + 7) // 8
+        (count,) = struct.unpack_from("<H", data, offset)
+        pending = struct.unpack_from(f"<{count}H", data, offset + 2)
+    except (struct.error, UnicodeDecodeError) as error:
+        raise ValueError(f"bad snapshot: {error}") from error
+
+    states = state.states
+    for index in range(len(state)):
+        if revealed[index >> 3] >> (index & 7) & 1 and states[index] == HIDDEN:
+            states[index] = REVEALED
+    for index in pending:
+        if index >= len(state) or states[index] != HIDDEN:
+            raise ValueError(f"bad snapshot: cell {index} cannot be pending")
+        states[index] = PENDING
+    state.pending = deque(pending)
+    return state
+
+
+def to_text(state):
+    return base64.urlsafe_b64encode(encode(state)).decode("ascii")
+
+
+def from_text(text):
+    try:
+        data = base64.urlsafe_b64decode(text)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"bad snapshot: {error}") from error
+    return decode(data)
+
+
+# Send a client storage call without waiting for the client's answer.
+# page.client_storage waits for it, a round trip on every click, so this goes
+# through Page._invoke_method and Page._convert_attr_json. Both are private
+# and used as they are in flet 0.27.6; check them when upgrading Flet.
+def _send_to_client_storage(page, method, key, value=None):
+    arguments = {"key": key}
+    if value is not None:
+        arguments["value"] = page._convert_attr_json(value)
+    page._invoke_method(f"clientStorage:{method}", arguments)
+
+
+# Id of the device, kept in its client storage (created the first time).
+# Falls back to the session id if the client does not answer.
+async def client_id(page):
+    try:
+        value = await page.client_storage.get_async(CLIENT_ID_KEY)
+    except (TimeoutError, asyncio.TimeoutError):
+        return page.session_id
+    if not value:
+        value = uuid.uuid4().hex
+        _send_to_client_storage(page, "set", CLIENT_ID_KEY, value)
+    return value
+
+
+# Snapshot kept in the client's storage (browser local storage, or the
+# desktop app's preferences), so it survives a new session on the same device
+class ClientStore:
+    def __init__(self, page, key=STORAGE_KEY):
+        self.page = page
+        self.key = key
+
+    # Fire and forget: waiting for the client to confirm would add a round
+    # trip to every click
+    def save(self, state):
+        _send_to_client_storage(self.page, "set", self.key, to_text(state))
+
+    def clear(self):
+        _send_to_client_storage(self.page, "remove", self.key)
+
+    async def load(self):
+        try:
+            text = await self.page.client_storage.get_async(self.key)
+        except (TimeoutError, asyncio.TimeoutError):
+            return None
+        return from_text(text) if text else None
+
+
+# Snapshot kept in a local file per device, for the desktop app or a server
+# that should keep the games on its own disk. Files are read and written on a
+# thread, so a click never waits for the disk.
+class FileStore:
+    def __init__(self, directory, page, key=STORAGE_KEY):
+        self.directory = directory
+        self.page = page
+        self.key = key
+        self._path = None  # Task finding the file of this device (see client_id)
+        self._latest = None  # Bytes waiting to be written, b"" to remove the file
+        self._writer = None
+
+    def path(self):
+        if self._path is None:
+            self._path = asyncio.get_running_loop().create_task(self._find_path())
+        return self._path
+
+    async def _find_path(self):
+        return os.path.join(self.directory, f"{self.key}.{await client_id(self.page)}.snapshot")
+
+    def save(self, state):
+        self._queue_write(encode(state))
+
+    def clear(self):
+        self._queue_write(b"")
+
+    # One write runs at a time; a snapshot queued meanwhile replaces any
+    # older one still waiting, so only the latest is written
+    def _queue_write(self, data):
+        self._latest = data
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self):
+        path = await self.path()
+        while self._latest is not None:
+            data, self._latest = self._latest, None
+            await asyncio.to_thread(_write_file, path, data)
+
+    async def load(self):
+        data = await asyncio.to_thread(_read_file, await self.path())
+        return decode(data) if data else None
+
+
+def _write_file(path, data):
+    if not data:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_file(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def open_store(page):
+    if SNAPSHOT_DIR:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        return FileStore(SNAPSHOT_DIR, page)
+    return ClientStore(page)
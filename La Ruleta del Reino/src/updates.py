@@ -0,0 +1,31 @@
+# Collects the controls changed while handling one user action and sends
+# them to the client in a single batch, instead of diffing the whole page.
+class UpdateBatch:
+    def __init__(self, page):
+        self.page = page
+        self.dirty = {}  # id(control) -> control, in the order they were marked
+
+        # Counters of what has been changed and sent to the client
+        self.controls_marked = 0  # Number of controls marked as changed
+        self.patches_sent = 0     # Number of page.update() batches
+        self.controls_sent = 0    # Number of controls included in those batches
+
+    # Mark controls as changed so they go out with the next flush
+    def mark(self, *controls):
+        for control in controls:
+            self.dirty[id(control)] = control
+        self.controls_marked += len(controls)
+
+    # Send every changed control in one page.update() call
+    def flush(self):
+        if not self.dirty:
+            return
+        # Controls without a uid are not on the client yet (e.g. inside a container
+        # that was hidden); they are sent in full when their parent is updated
+        controls = [control for control in self.dirty.values() if control.uid is not None]
+        self.dirty.clear()
+        if not controls:
+            return
+        self.page.update(*controls)
+        self.patches_sent += 1
+        self.controls_sent += len(controls)
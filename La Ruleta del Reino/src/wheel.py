@@ -0,0 +1,206 @@
+# The roulette wheel that sets the points of a turn, drawn on a canvas and
+# spun by an asyncio frame loop.
+#
+# The wedges are drawn once, as an SVG image. A spin only changes the rotation
+# of the container holding the image, so a frame sends one number to the
+# client and the server diffs a single control (a canvas of wedges would make
+# every frame diff all of its shapes).
+# The wheel slows down from friction (proportional to its speed) plus a
+# constant brake; the angle is computed in closed form from the time since
+# the spin started, so frames that are dropped do not change where it stops.
+#
+# The frame loop aims for FPS frames a second: a frame does its work, then
+# sleeps until the next frame is due, so the handlers of other sessions run in
+# between. A frame that starts late skips the frames it missed instead of
+# running them back to back. Frame times and dropped frames are kept in
+# FrameStats (shown in the instrumentation overlay when it is on).
+import asyncio
+import base64
+import math
+import random
+import time
+from typing import NamedTuple, Optional
+from xml.sax.saxutils import escape
+
+import flet as ft
+import flet.canvas as cv
+
+from instrumentation import HandlerStats
+
+FPS = 60
+MIN_STEP = 0.002  # Radians; smaller changes of the angle are not sent
+
+# Friction (1/s) and brake (rad/s²) of the wheel, and its starting speed (rad/s)
+FRICTION = 0.4
+BRAKE = 1.5
+SPEED_RANGE = (15.0, 25.0)
+
+QUIEBRA = "QUIEBRA"
+PIERDE_TURNO = "PIERDE TURNO"
+
+
+# One wedge: its label, the points per letter it gives (None for QUIEBRA and
+# PIERDE TURNO) and its color (hex, it goes into the SVG)
+class Wedge(NamedTuple):
+    label: str
+    points: Optional[int]
+    color: str
+
+
+WEDGES = (
+    Wedge("100", 100, "#EF5350"),
+    Wedge("50", 50, "#FFA726"),
+    Wedge("200", 200, "#FDD835"),
+    Wedge(QUIEBRA, None, "#000000"),
+    Wedge("75", 75, "#66BB6A"),
+    Wedge("150", 150, "#26A69A"),
+    Wedge("25", 25, "#42A5F5"),
+    Wedge("300", 300, "#5C6BC0"),
+    Wedge(PIERDE_TURNO, None, "#FFFFFF"),
+    Wedge("100", 100, "#AB47BC"),
+    Wedge("50", 50, "#EC407A"),
+    Wedge("500", 500, "#FFA000"),
+    Wedge("75", 75, "#8BC34A"),
+    Wedge(QUIEBRA, None, "#000000"),
+    Wedge("150", 150, "#26C6DA"),
+    Wedge("25", 25, "#FF7043"),
+)
+
+
+# Angle and speed of a spin t seconds after it started, from the solution of
+# speed' = -(FRICTION * speed + BRAKE). Returns (angle, still moving).
+def spin_angle(start_angle, speed, t):
+    terminal = BRAKE / FRICTION
+    stop_time = math.log((speed + terminal) / terminal) / FRICTION
+    t = min(t, stop_time)
+    angle = start_angle + (speed + terminal) * (1 - math.exp(-FRICTION * t)) / FRICTION - terminal * t
+    return angle, t < stop_time
+
+
+# Index of the wedge under the pointer (at the top) for a wheel turned angle
+# radians clockwise
+def wedge_at(angle, wedges=WEDGES):
+    size = 2 * math.pi / len(wedges)
+    return int(((-angle) % (2 * math.pi)) // size) % len(wedges)
+
+
+# Frame times (work done per frame, in ms) and frames dropped
+class FrameStats(HandlerStats):
+    def __init__(self):
+        super().__init__()
+        self.dropped = 0
+
+    def summary(self):
+        return {**super().summary(), "dropped": self.dropped}
+
+
+# Call frame(now) about fps times a second until it is done. frame returns
+# (still running, whether it sent an update); only frames that sent one are
+# recorded in stats. Frames that could not run on time are dropped, not caught up.
+async def run_frames(frame, stats, fps=FPS):
+    interval = 1 / fps
+    due = time.perf_counter()
+    while True:
+        start = time.perf_counter()
+        if start - due >= interval:
+            missed = int((start - due) / interval)
+            stats.dropped += missed
+            due += missed * interval
+        running, sent = frame(start)
+        if sent:
+            stats.add((time.perf_counter() - start) * 1000, 1, 1)
+        if not running:
+            return
+        due += interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+
+# The wheel as a base64 SVG image, with the first wedge under the pointer
+def wheel_image(size, wedges=WEDGES):
+    radius = size / 2
+    sweep = 2 * math.pi / len(wedges)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+             f'viewBox="0 0 {size} {size}">']
+    for number, wedge in enumerate(wedges):
+        start = -math.pi / 2 + number * sweep
+        end = start + sweep
+        parts.append(
+            f'<path d="M{radius:g},{radius:g} '
+            f'L{radius + radius * math.cos(start):.2f},{radius + radius * math.sin(start):.2f} '
+            f'A{radius:g},{radius:g} 0 0 1 {radius + radius * math.cos(end):.2f},{radius + radius * math.sin(end):.2f} Z" '
+            f'fill="{wedge.color}"/>'
+        )
+        middle = start + sweep / 2
+        x = radius + 0.7 * radius * math.cos(middle)
+        y = radius + 0.7 * radius * math.sin(middle)
+        label = "Q" if wedge.label == QUIEBRA else "PT" if wedge.label == PIERDE_TURNO else wedge.label
+        parts.append(
+            f'<text x="{x:.2f}" y="{y:.2f}" transform="rotate({math.degrees(middle) + 90:.2f} {x:.2f} {y:.2f})" '
+            f'text-anchor="middle" dominant-baseline="central" font-family="sans-serif" font-weight="bold" '
+            f'font-size="11" fill="{"#000000" if wedge.color == "#FFFFFF" else "#FFFFFF"}">{escape(label)}</text>'
+        )
+    parts.append(f'<circle cx="{radius:g}" cy="{radius:g}" r="{radius - 1.5:g}" fill="none" '
+                 f'stroke="#1565C0" stroke-width="3"/>')
+    parts.append(f'<circle cx="{radius:g}" cy="{radius:g}" r="{radius * 0.12:g}" fill="#1565C0"/>')
+    parts.append("</svg>")
+    return base64.b64encode("".join(parts).encode("utf-8")).decode("ascii")
+
+
+class Wheel:
+    def __init__(self, size=200):
+        self.size = size
+        self.angle = 0.0
+        self.stats = FrameStats()
+        self.task = None
+
+        # Only this container's rotation changes while spinning
+        self.disc = ft.Container(
+            content=ft.Image(src_base64=wheel_image(size), width=size, height=size),
+            width=size,
+            height=size,
+            rotate=0,  # Radians, around the center
+        )
+        radius = size / 2
+        pointer = cv.Canvas(shapes=[cv.Path(
+            [cv.Path.MoveTo(radius - 10, 0), cv.Path.LineTo(radius + 10, 0),
+             cv.Path.LineTo(radius, 22), cv.Path.Close()],
+            paint=ft.Paint(color=ft.Colors.RED_700, style=ft.PaintingStyle.FILL),
+        )], width=size, height=24)
+        self.view = ft.Stack([self.disc, pointer], width=size, height=size)
+
+    @property
+    def spinning(self):
+        return self.task is not None and not self.task.done()
+
+    @property
+    def wedge(self):
+        return WEDGES[wedge_at(self.angle)]
+
+    # Spin on the current event loop (call it from an async handler).
+    # send(control) sends the rotation of each frame; on_stop(wedge) is called
+    # when the wheel stops.
+    def spin(self, send, on_stop, rng=random):
+        self.cancel()
+        start_angle = self.angle
+        speed = rng.uniform(*SPEED_RANGE)
+        started = time.perf_counter()
+
+        def frame(now):
+            angle, moving = spin_angle(start_angle, speed, now - started)
+            if abs(angle - self.angle) < MIN_STEP and moving:
+                return True, False  # Too small a turn to send
+            self.angle = angle
+            self.disc.rotate = round(angle, 4)
+            send(self.disc)
+            return moving, True
+
+        async def run():
+            await run_frames(frame, self.stats)
+            on_stop(self.wedge)
+
+        self.task = asyncio.get_running_loop().create_task(run())
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -0,0 +1,216 @@
+# Word index for the "Pista" hints: candidate dictionary words for a partly
+# revealed word of the panel, e.g. "A _ _ A" with the guessed letters ruled
+# out of the hidden cells.
+#
+# Words are grouped by length. For every length, position and letter of the
+# normalized alphabet (accents ignored, Ñ kept, as in panel_state) the index
+# stores a bitmap of the words having that letter there, so a query is a few
+# ANDs of those bitmaps instead of a scan of the dictionary. Bitmaps are read
+# from a memory-mapped file on first use and kept as Python ints.
+#
+# Build an index from word lists (one word per line, Hunspell .dic files too):
+#   python src/word_index.py palabras.txt -o src/assets/palabras.rrwi
+import os
+from array import array
+from functools import lru_cache
+
+from index_file import open_index, section_view, write_index
+
+from panel_state import ALPHABET, HIDDEN, LETTER_BITS, PENDING, REVEALED, SPECIAL, normalize_letter
+
+MAGIC = b"RRWI0001"
+LETTER_INDEX = {letter: position for position, letter in enumerate(ALPHABET)}
+
+
+# Words of a word list file, upper-cased. Lines are "word" or "word/FLAGS"
+# (Hunspell); "#" comments and the word count line of .dic files are skipped.
+def read_words(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            word = line.split("/", 1)[0].strip()
+            if word and not word.startswith("#") and not word.isdigit():
+                yield word.upper()
+
+
+# Normalized letters of a word as ALPHABET positions, or None if the word has
+# anything but letters. normalize_letter is slow, so results are kept per character.
+def letter_positions(word, cache):
+    positions = []
+    for char in word:
+        position = cache.get(char)
+        if position is None:
+            position = cache[char] = LETTER_INDEX.get(normalize_letter(char), -1)
+        if position < 0:
+            return None
+        positions.append(position)
+    return positions
+
+
+# Build the index file from words; returns the number of words indexed
+def build_index(words, path):
+    cache = {}
+    by_length = {}
+    for word in set(words):
+        positions = letter_positions(word, cache)
+        if positions:
+            by_length.setdefault(len(positions), []).append((word, positions))
+
+    text = bytearray()
+    text_offsets = array("I", [0])
+    bitmaps = []
+    lengths = {}
+    first_word = 0
+    bitmap_offset = 0
+    for length in sorted(by_length):
+        entries = sorted(by_length[length])
+        size = (len(entries) + 7) // 8
+        # One bitmap per (position, letter), position-major
+        group = [bytearray(size) for _ in range(length * len(ALPHABET))]
+        for number, (word, positions) in enumerate(entries):
+            text += word.encode("utf-8")
+            text_offsets.append(len(text))
+            byte, bit = number >> 3, 1 << (number & 7)
+            for position, letter in enumerate(positions):
+                group[position * len(ALPHABET) + letter][byte] |= bit
+        lengths[length] = {"first": first_word, "count": len(entries),
+                           "bitmaps": bitmap_offset, "bitmap_size": size}
+        first_word += len(entries)
+        bitmap_offset += size * len(group)
+        bitmaps.extend(group)
+
+    write_index(path, MAGIC, {
+        "count": first_word,
+        "alphabet": ALPHABET,
+        "lengths": lengths,
+    }, {
+        "text": bytes(text),
+        "text_offsets": text_offsets,
+        "bitmaps": b"".join(bitmaps),
+    })
+    return first_word
+
+
+# Read-only view of an index file; bitmaps are converted to ints when first queried
+class WordIndex:
+    def __init__(self, path):
+        self.path = path
+        self._map, header, data_start = open_index(path, MAGIC, "word index")
+        if header["alphabet"] != ALPHABET:
+            raise ValueError(f"{path} was built for another alphabet")
+
+        self.count = header["count"]
+        self._lengths = {int(length): group for length, group in header["lengths"].items()}
+        self._sections = {
+            name: section_view(self._map, data_start, *entry)
+            for name, entry in header["sections"].items()
+        }
+        self._offsets = self._sections["text_offsets"]
+        self._bitmaps = {}
+
+    def __len__(self):
+        return self.count
+
+    def word(self, number):
+        return bytes(self._sections["text"][self._offsets[number]:self._offsets[number + 1]]).decode("utf-8")
+
+    # Bitmap of the words of a length with a letter (ALPHABET position) at a position
+    def _bitmap(self, length, position, letter):
+        key = (length, position, letter)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            group = self._lengths[length]
+            size = group["bitmap_size"]
+            start = group["bitmaps"] + (position * len(ALPHABET) + letter) * size
+            bitmap = int.from_bytes(self._sections["bitmaps"][start:start + size], "little")
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    # Words matching a pattern: one normalized letter (see panel_state.ALPHABET)
+    # or None per cell. Hidden cells cannot hold a letter of the excluded mask
+    # (panel_state.LETTER_BITS). Returns the number of matches and up to limit of them.
+    def candidates(self, pattern, excluded=0, limit=20):
+        length = len(pattern)
+        group = self._lengths.get(length)
+        if group is None:
+            return 0, []
+        excluded_letters = [LETTER_INDEX[letter] for letter in ALPHABET if excluded & LETTER_BITS[letter]]
+
+        matches = (1 << group["count"]) - 1
+        for position, letter in enumerate(pattern):
+            if letter is not None:
+                if letter not in LETTER_INDEX:
+                    return 0, []
+                matches &= self._bitmap(length, position, LETTER_INDEX[letter])
+            else:
+                for excluded_letter in excluded_letters:
+                    matches &= ~self._bitmap(length, position, excluded_letter)
+            if not matches:
+                return 0, []
+
+        count = bin(matches).count("1")
+        words = []
+        while matches and len(words) < limit:
+            lowest = matches & -matches
+            words.append(self.word(group["first"] + lowest.bit_length() - 1))
+            matches ^= lowest
+        return count, words
+
+    def close(self):
+        self._bitmaps.clear()
+        self._sections.clear()
+        self._offsets = None
+        self._map.close()
+
+
+# Patterns of the words of a panel that still have hidden cells, for
+# WordIndex.candidates: (cell range, pattern) pairs. Pending cells count as
+# known, their letter was guessed. Words with digits or inner symbols are skipped.
+def panel_patterns(state):
+    patterns = []
+    start = 0
+    for word in state.phrase.split(" "):
+        end = start + len(word)
+        cells = range(start, end)
+        # Leave out punctuation around the word, like "CARA," or "¿QUÉ"
+        while cells and state.states[cells[0]] == SPECIAL:
+            cells = cells[1:]
+        while cells and state.states[cells[-1]] == SPECIAL:
+            cells = cells[:-1]
+        if cells and all(state.phrase[index].isalpha() for index in cells):
+            pattern = [
+                state.normalized[index] if state.states[index] in (PENDING, REVEALED) else None
+                for index in cells
+            ]
+            if any(state.states[index] == HIDDEN for index in cells):
+                patterns.append((cells, pattern))
+        start = end + 1
+    return patterns
+
+
+# Open an index once per process; sessions share the same mapping.
+# Returns None when the file does not exist.
+@lru_cache(maxsize=4)
+def open_word_index(path):
+    if not path or not os.path.exists(path):
+        return None
+    return WordIndex(path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a word index for the hints")
+    parser.add_argument("sources", nargs="+", help="word lists, one word per line")
+    parser.add_argument("-o", "--output", required=True, help="index file to write")
+    args = parser.parse_args()
+
+    def words():
+        for source in args.sources:
+            yield from read_words(source)
+
+    count = build_index(words(), args.output)
+    print(f"{count} words -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
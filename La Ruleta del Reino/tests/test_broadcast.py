@@ -0,0 +1,155 @@
+import asyncio
+
+from broadcast import (HELLO, PANEL, PENDING_CELLS, RESET, REVEALED_CELLS, SYNC, Presenter, Spectator,
+                       room_topic, spectator_topic)
+from panel_state import HIDDEN, PENDING, REVEALED, PanelState
+
+
+# In-process stand-in for page.pubsub: one client per session on a shared hub.
+# Messages are delivered when the hub is run.
+class Hub:
+    def __init__(self):
+        self.subscribers = {}  # topic -> {session: handler}
+        self.queued = []
+
+    def client(self, session):
+        return HubClient(self, session)
+
+    def deliver(self, topic, message, skip=None):
+        for session, handler in list(self.subscribers.get(topic, {}).items()):
+            if session != skip:
+                self.queued.append(handler(topic, message))
+
+    def run(self):
+        async def drain():
+            while self.queued:
+                await self.queued.pop(0)
+        asyncio.run(drain())
+
+
+class HubClient:
+    def __init__(self, hub, session):
+        self.hub = hub
+        self.session = session
+        self.sent = []
+
+    def subscribe_topic(self, topic, handler):
+        self.hub.subscribers.setdefault(topic, {})[self.session] = handler
+
+    def unsubscribe_topic(self, topic):
+        self.hub.subscribers.get(topic, {}).pop(self.session, None)
+
+    def send_others_on_topic(self, topic, message):
+        self.sent.append((topic, message))
+        self.hub.deliver(topic, message, skip=self.session)
+
+    def send_all_on_topic(self, topic, message):
+        self.sent.append((topic, message))
+        self.hub.deliver(topic, message)
+
+
+def watching(hub, session, room="aula"):
+    received = []
+
+    async def handler(event):
+        received.append(event)
+
+    return Spectator(hub.client(session), room, session, handler), received
+
+
+def test_host_events():
+    hub = Hub()
+    state = PanelState("HOLA")
+    host = Presenter(hub.client("host"), "aula", lambda: state)
+    spectator, received = watching(hub, "alumno")
+    hub.run()
+    received.clear()  # The SYNC of the join
+    host.panel(state.phrase)
+    host.pending((1,))
+    host.pending([])  # Nothing to send
+    host.revealed([1, 3])
+    host.revealed(())
+    host.reset()
+    hub.run()
+    assert received == [(PANEL, "HOLA"), (PENDING_CELLS, (1,)), (REVEALED_CELLS, (1, 3)), (RESET,)]
+    assert host.events_sent == 4
+
+
+def test_late_spectator_gets_sync():
+    hub = Hub()
+    state = PanelState("CASA")
+    state.guess("A")
+    state.reveal_next()
+    host = Presenter(hub.client("host"), "aula", lambda: state)
+    first, first_received = watching(hub, "primero")
+    late, late_received = watching(hub, "tarde")
+    hub.run()
+
+    sync = (SYNC, "CASA", bytes([HIDDEN, REVEALED, HIDDEN, PENDING]), (3,))
+    assert late_received == [sync]
+    # Each spectator's SYNC goes to its own topic, so others never see it
+    assert first_received == [sync]
+    assert (spectator_topic("aula", "tarde"), sync) in host.pubsub.sent
+    assert late.pubsub.sent == [(room_topic("aula"), (HELLO, "tarde"))]
+
+
+def test_no_sync_without_a_panel():
+    hub = Hub()
+    host = Presenter(hub.client("host"), "aula", lambda: None)
+    spectator, received = watching(hub, "alumno")
+    hub.run()
+    assert received == []
+    assert host.events_sent == 0
+
+
+def test_other_rooms_and_closed_spectators_hear_nothing():
+    hub = Hub()
+    host = Presenter(hub.client("host"), "aula", lambda: None)
+    elsewhere, elsewhere_received = watching(hub, "otro", room="patio")
+    gone, gone_received = watching(hub, "ido")
+    gone.close()
+    host.panel("HOLA")
+    hub.run()
+    assert elsewhere_received == gone_received == []
+
+
+# Host and spectator panels stay the same through the events
+def test_apply_mirrors_the_host():
+    host = PanelState("BANANA")
+    mirror = PanelState(host.phrase)
+
+    mirror.apply(host.guess("A"), PENDING)
+    assert mirror.states == host.states
+    assert list(mirror.pending) == [1, 3, 5]
+
+    mirror.apply([host.reveal_next()], REVEALED)
+    assert mirror.states == host.states
+    assert list(mirror.pending) == [3, 5]
+
+    mirror.apply(host.guess("N"), PENDING)
+    mirror.apply(host.reveal_all(), REVEALED)
+    assert mirror.states == host.states
+    assert not mirror.has_pending
+    assert mirror.solved
+
+
+def test_apply_reveals_out_of_order():
+    state = PanelState("BANANA")
+    state.apply((1, 3, 5), PENDING)
+    state.apply((3,), REVEALED)
+    assert list(state.pending) == [1, 5]
+    assert state.states[3] == REVEALED
+
+
+def test_sync_restores_a_panel_in_progress():
+    host = PanelState("¿QUÉ TAL?")
+    host.guess("T")
+    host.guess("A")
+    host.reveal_next()
+    event = (SYNC, host.phrase, bytes(host.states), tuple(host.pending))
+
+    mirror = PanelState(event[1])
+    mirror.restore(event[2], event[3])
+    assert mirror.states == host.states
+    assert list(mirror.pending) == list(host.pending)
+    assert mirror.reveal_next() == host.reveal_next()
@@ -0,0 +1,65 @@
+from cells import CELL_STYLES, CellPool, style_cell
+from panel_state import HIDDEN, PENDING, REVEALED, SPACE, SPECIAL
+
+
+def widths(cells):
+    return [cell.width for cell in cells]
+
+
+def test_recycle_after_width_change():
+    pool = CellPool()
+    cells = pool.recycle([], 10, 40)
+    cells = pool.recycle(cells, 15, 35)
+    assert widths(cells) == [35] * 15
+    assert all(cell.height == 35 * 1.5 and cell.content.size == 21 for cell in cells)
+    cells = pool.recycle(cells, 4, 30)
+    assert widths(cells) == [30] * 4
+
+
+def test_acquire_reuses_released_cells():
+    pool = CellPool()
+    first = pool.acquire(40)
+    assert pool.created == 1
+    pool.release([first])
+    assert pool.acquire(30) is first
+    assert first.width == 30
+    pool.acquire(30)
+    assert pool.created == 2
+
+
+def test_recycle_keeps_cells_in_order():
+    pool = CellPool()
+    cells = pool.recycle([], 6, 40)
+    assert pool.created == 6
+    shorter = pool.recycle(cells, 4, 40)
+    assert shorter == cells[:4]
+    assert pool.free == cells[4:]
+
+    # The surplus comes back before any new cell is made
+    longer = pool.recycle(shorter, 7, 40)
+    assert longer[:4] == cells[:4]
+    assert set(map(id, longer[4:6])) == set(map(id, cells[4:]))
+    assert pool.created == 7
+    assert pool.free == []
+
+
+def test_cells_share_styles():
+    pool = CellPool()
+    cells = pool.recycle([], 3, 40)
+    style_cell(cells[0], HIDDEN, "A")
+    style_cell(cells[1], PENDING, "B")
+    style_cell(cells[2], REVEALED, "C")
+    assert cells[0].border is cells[1].border is cells[2].border is CELL_STYLES[HIDDEN].border
+    assert cells[0].shadow is cells[2].shadow is CELL_STYLES[REVEALED].shadow
+    assert cells[1].shadow is CELL_STYLES[PENDING].shadow
+    assert [cell.content.value for cell in cells] == ["", "", "C"]
+
+    # A recycled cell takes the style of its new state
+    pool.release(cells)
+    cell = pool.acquire(40)
+    style_cell(cell, SPACE, " ")
+    assert cell.border is None and not cell.shadow
+    assert cell.content.value == ""
+    style_cell(cell, SPECIAL, "¿")
+    assert cell.border is CELL_STYLES[SPECIAL].border
+    assert cell.content.value == "¿"
@@ -0,0 +1,114 @@
+import os
+import time
+
+import pytest
+
+import event_log
+from event_log import GUESS, PANEL, REVEAL, SESSION, SOLVE, EventLog, read_events, summarize
+
+
+def write_round(log, session_id, phrase, letters, solve=True):
+    session = log.session(session_id)
+    log.panel(session, phrase)
+    for letter in letters:
+        log.guess(session, letter, 1)
+    log.reveal(session, 3)
+    if solve:
+        log.solve(session, 5)
+    return session
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "eventos.rrlog")
+    log = EventLog(path)
+    session = write_round(log, "sesión-1", "MAÑANA SERÁ OTRO DÍA", "AÑ")
+    log.close()
+    assert log.written == 6
+
+    events = list(read_events(path))
+    assert [event.kind for event in events] == [SESSION, PANEL, GUESS, GUESS, REVEAL, SOLVE]
+    assert all(event.session == session for event in events)
+    assert [event.data for event in events] == [
+        "sesión-1", "MAÑANA SERÁ OTRO DÍA", ("A", 1), ("Ñ", 1), 3, 5,
+    ]
+
+
+def test_records_across_read_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(event_log, "READ_BLOCK", 7)
+    path = str(tmp_path / "eventos.rrlog")
+    log = EventLog(path)
+    for number in range(20):
+        write_round(log, f"s{number}", "HOLA MUNDO", "OA")
+    log.close()
+    assert len(list(read_events(path))) == 20 * 6
+
+
+def test_cut_record_is_ignored(tmp_path):
+    path = tmp_path / "eventos.rrlog"
+    log = EventLog(str(path))
+    write_round(log, "s", "HOLA", "O")
+    log.close()
+    path.write_bytes(path.read_bytes()[:-1])
+    assert [event.kind for event in read_events(str(path))] == [SESSION, PANEL, GUESS, REVEAL]
+
+
+def test_flushed_under_steady_traffic(tmp_path, monkeypatch):
+    monkeypatch.setattr(event_log, "FLUSH_INTERVAL", 0.05)
+    path = str(tmp_path / "eventos.rrlog")
+    log = EventLog(path)
+    session = log.session("s")
+    for _ in range(40):
+        log.reveal(session, 1)
+        time.sleep(0.01)  # Never idle for FLUSH_INTERVAL
+    try:
+        assert os.path.getsize(path) > len(event_log.MAGIC)
+    finally:
+        log.close()
+
+
+def test_summary(tmp_path):
+    path = str(tmp_path / "eventos.rrlog")
+    log = EventLog(path)
+    write_round(log, "a", "HOLA", "OA")
+    write_round(log, "b", "ADIÓS", "AS")
+    log.close()
+    summary = summarize(read_events(path))
+    assert summary["rounds"] == 2
+    assert dict(summary["first_guesses"]) == {"O": 1, "A": 1}
+    assert dict(summary["guesses"]) == {"A": 2, "O": 1, "S": 1}
+
+
+def test_restart_starts_new_sessions(tmp_path):
+    # After a restart session numbers start again; an open round is not
+    # closed by the new session with the same number
+    path = str(tmp_path / "eventos.rrlog")
+    before = EventLog(path)
+    first = write_round(before, "antes", "HOLA", "O", solve=False)
+    before.close()
+    after = EventLog(path)
+    second = write_round(after, "después", "ADIÓS", "A")
+    after.close()
+    assert first == second
+    assert summarize(read_events(path))["rounds"] == 1
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "eventos.rrlog"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        list(read_events(str(path)))
+    with pytest.raises(ValueError):
+        EventLog(str(path))
+
+
+def test_many_sessions(tmp_path):
+    # Session numbers do not wrap at 16 bits
+    path = str(tmp_path / "eventos.rrlog")
+    log = EventLog(path)
+    for number in range(70000):
+        last = log.session(str(number))
+    log.close()
+    assert last == 69999
+    events = list(read_events(path))
+    assert len({event.session for event in events}) == 70000
+    assert events[-1].data == "69999"
@@ -0,0 +1,86 @@
+import asyncio
+import pstats
+from types import SimpleNamespace
+
+import instrumentation
+from instrumentation import Instrumentation
+
+
+def fresh(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "CPROFILE_PATH", str(tmp_path / "profile.out"))
+    monkeypatch.setattr(instrumentation, "_profile_claimed", False)
+    return Instrumentation(SimpleNamespace(controls_marked=0, patches_sent=0), "s")
+
+
+def profiled_functions(profiler):
+    return {function for _, _, function in pstats.Stats(profiler).stats}
+
+
+def other_session_work():
+    return sum(range(100))
+
+
+def own_work():
+    return sum(range(100))
+
+
+def test_waits_are_not_profiled(monkeypatch, tmp_path):
+    stats = fresh(monkeypatch, tmp_path)
+    records = []
+    stats.on_record = lambda: records.append(len(records))
+
+    async def run():
+        loaded = asyncio.Event()
+
+        async def resume():
+            await loaded.wait()  # A client round trip
+            own_work()
+
+        async def other():
+            other_session_work()
+            loaded.set()
+
+        async def click():
+            pass
+
+        resume = stats.wrap("resume", resume)
+        click = stats.wrap("click", click)
+        waiting = asyncio.create_task(resume())
+        await asyncio.sleep(0)
+        await click()  # Runs while resume waits, still a top-level call
+        await other()
+        await waiting
+
+    asyncio.run(run())
+    functions = profiled_functions(stats.profiler)
+    assert "own_work" in functions
+    assert "other_session_work" not in functions
+    assert len(records) == 2
+    assert stats.stats["resume"].count == stats.stats["click"].count == 1
+
+
+def test_nested_and_failing_handlers(monkeypatch, tmp_path):
+    stats = fresh(monkeypatch, tmp_path)
+    records = []
+    stats.on_record = lambda: records.append(len(records))
+
+    inner = stats.wrap("inner", lambda: own_work())
+
+    async def outer():
+        inner()
+        await asyncio.sleep(0)
+        raise KeyError
+
+    outer = stats.wrap("outer", outer)
+
+    async def run():
+        try:
+            await outer()
+        except KeyError:
+            pass
+        other_session_work()
+
+    asyncio.run(run())
+    assert len(records) == 1  # inner is nested in outer
+    assert stats._profiling == 0
+    assert "other_session_work" not in profiled_functions(stats.profiler)
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from panel_state import BOARD_ROWS, balanced_rows, board_capacities, wrap_phrase
+
+PHRASES = [
+    "HOLA",
+    "HOLA MUNDO",
+    "MÁS VALE PÁJARO EN MANO QUE CIENTO VOLANDO",
+    "EN UN LUGAR DE LA MANCHA DE CUYO NOMBRE NO QUIERO ACORDARME",
+    "A CABALLO REGALADO NO LE MIRES EL DIENTE",
+    "¿QUIÉN ES? ¡YO!",
+    "ELECTROENCEFALOGRAFISTA",  # Longer than any row
+    "EL OTORRINOLARINGÓLOGO DE LA ESQUINA",
+]
+
+
+def random_phrases(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield " ".join("X" * rng.randint(1, 10) for _ in range(rng.randint(1, 14)))
+
+
+ALL_PHRASES = PHRASES + list(random_phrases(300))
+
+
+def joined(phrase):
+    return " ".join(phrase.split())
+
+
+# Every non-space cell is in exactly one row, rows are in order and only spaces are left out
+def check_cells(phrase, rows):
+    text = joined(phrase)
+    placed = [index for cell_range in rows for index in cell_range]
+    assert placed == sorted(set(placed))
+    left_out = set(range(len(text))) - set(placed)
+    assert all(text[index] == " " for index in left_out)
+
+
+@pytest.mark.parametrize("width", [8, 12])
+@pytest.mark.parametrize("phrase", ALL_PHRASES)
+def test_flat_board(phrase, width):
+    rows = balanced_rows(phrase, board_capacities(width, "flat"))
+    check_cells(phrase, rows)
+    assert all(len(cell_range) <= width for cell_range in rows)
+    assert len(rows) <= len(wrap_phrase(phrase, width))
+
+
+@pytest.mark.parametrize("width", [8, 12])
+@pytest.mark.parametrize("phrase", ALL_PHRASES)
+def test_show_board(phrase, width):
+    board = board_capacities(width, "show")
+    rows = balanced_rows(phrase, board)
+    check_cells(phrase, rows)
+    widths = [len(cell_range) for cell_range in rows]
+    assert max(widths) <= width
+
+    # Centered on the board, rows fit the widths of the rows they take, unless
+    # the panel is taller than the board or its words do not fit its shape
+    if len(rows) <= BOARD_ROWS and max(len(word) for word in phrase.split()) <= width - 2:
+        free = BOARD_ROWS - len(rows)
+        assert any(
+            all(row_width <= capacity for row_width, capacity in zip(widths, board[offset:]))
+            for offset in {free // 2, (free + 1) // 2}
+        )
+
+
+# Squared empty cells of each row, counting only the cells of words
+def raggedness(phrase, rows, width):
+    text = joined(phrase)
+    return sum((width - len(text[cell_range.start:cell_range.stop].strip())) ** 2 for cell_range in rows)
+
+
+@pytest.mark.parametrize("phrase", ALL_PHRASES)
+def test_no_more_ragged_than_greedy(phrase):
+    if max(len(word) for word in phrase.split()) > 12:
+        pytest.skip("words longer than a row are wrapped like greedy")
+    greedy = wrap_phrase(phrase, 12)
+    balanced = balanced_rows(phrase, (12,) * len(greedy))
+    assert len(balanced) == len(greedy)
+    assert raggedness(phrase, balanced, 12) <= raggedness(phrase, greedy, 12)
+
+
+def test_balances_rows():
+    # Greedy fills the rows in order and leaves a short last row
+    phrase = "A CABALLO REGALADO NO LE MIRES EL DIENTE"
+    text = joined(phrase)
+    assert [text[r.start:r.stop].strip() for r in wrap_phrase(phrase, 12)] == \
+        ["A CABALLO", "REGALADO NO", "LE MIRES EL", "DIENTE"]
+    assert [text[r.start:r.stop] for r in balanced_rows(phrase, (12,) * 4)] == \
+        ["A CABALLO", "REGALADO", "NO LE MIRES", "EL DIENTE"]
+
+
+def test_words_longer_than_a_row_are_split():
+    rows = balanced_rows("EL ELECTROENCEFALOGRAFISTA", (8,) * 4)
+    assert [len(cell_range) for cell_range in rows] == [2, 8, 8, 7]
@@ -0,0 +1,47 @@
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import pytest
+
+from panel_export import file_name, render_phrases, render_png, render_svg, worksheet_state, write_images
+from panel_state import REVEALED
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def test_render_svg_in_process():
+    state = worksheet_state("¿Qué tal?", reveal="T")
+    root = ElementTree.fromstring(render_svg(state, 12, 40))
+    rects = root.findall(f"{SVG}rect")
+    assert len(rects) == 8  # Every cell but the space
+    texts = [text.text for text in root.findall(f"{SVG}text")]
+    assert texts == ["¿", "T", "?"]
+    assert {rect.get("width") for rect in rects} == {"40"}
+
+
+def test_render_png_in_process():
+    pytest.importorskip("PIL")
+    data = render_png(worksheet_state("HOLA"), 12, 40)
+    assert data.startswith(b"\x89PNG")
+
+
+def test_worksheet_state():
+    state = worksheet_state("BANANA", reveal="an")
+    assert state.phrase == "BANANA"
+    assert not state.has_pending
+    assert [state.phrase[index] for index in range(6) if state.states[index] == REVEALED] == list("ANANA")
+
+
+def test_file_name():
+    assert file_name(7, "¿QUÉ TAL, AMIGO?", "", "svg") == "00007-que-tal-amigo.svg"
+    assert file_name(7, "¿QUÉ TAL?", "AEIOU", "png") == "00007-que-tal-aeiou.png"
+
+
+def test_render_phrases_to_zip(tmp_path):
+    images = render_phrases(["HOLA", " ", "ADIÓS"], reveals=("", "A"), workers=1, batch_size=1)
+    output = str(tmp_path / "fichas.zip")
+    assert write_images(images, output) == 4
+    with zipfile.ZipFile(output) as archive:
+        assert archive.namelist() == [
+            "00001-hola.svg", "00001-hola-a.svg", "00003-adios.svg", "00003-adios-a.svg",
+        ]
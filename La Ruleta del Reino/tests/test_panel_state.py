@@ -0,0 +1,147 @@
+import pytest
+
+from panel_state import (HIDDEN, LETTER_BITS, PENDING, REVEALED, SPACE, SPECIAL, PanelState, guessable,
+                         letter_bit, letter_mask, normalize_letter)
+
+
+def cells(state, phrase_state):
+    return [index for index, cell in enumerate(state.states) if cell == phrase_state]
+
+
+def test_cells():
+    state = PanelState("  ¿quién   es?  ")
+    assert state.phrase == "¿QUIÉN ES?"
+    assert len(state) == 10
+    assert cells(state, SPACE) == [6]
+    assert cells(state, SPECIAL) == [0, 9]
+    assert cells(state, HIDDEN) == [1, 2, 3, 4, 5, 7, 8]
+    assert not state.solved
+
+
+def test_guess_ignores_accents():
+    state = PanelState("ÉL ES EL CAFÉ")
+    assert state.guess("e") == [0, 3, 6, 12]
+    assert list(state.pending) == [0, 3, 6, 12]
+    assert all(state.states[index] == PENDING for index in (0, 3, 6, 12))
+    assert state.guessed == LETTER_BITS["E"]
+
+    # An accented guess finds the same cells
+    other = PanelState("ÉL ES EL CAFÉ")
+    assert other.guess("É") == [0, 3, 6, 12]
+
+
+def test_guess_keeps_enie_apart():
+    state = PanelState("AÑO NUEVO")
+    assert state.guess("N") == [4]
+    assert state.guess("ñ") == [1]
+    assert state.guessed == LETTER_BITS["N"] | LETTER_BITS["ñ"]
+
+
+def test_repeated_and_missing_guesses():
+    state = PanelState("CASA")
+    assert state.guess("A") == [1, 3]
+    assert state.guess("A") == []  # Still pending
+    state.reveal_next()
+    assert state.guess("á") == []
+    assert list(state.pending) == [3]
+
+    # A letter not in the phrase is remembered as guessed
+    assert state.guess("Z") == []
+    assert state.guessed & LETTER_BITS["Z"]
+
+
+def test_symbols_and_spaces_are_never_matched():
+    state = PanelState("¡HOLA, MUNDO!")
+    assert state.guess("!") == []
+    assert state.guess(" ") == []
+    assert state.guess(",") == []
+    assert state.guessed == 0
+    assert not state.has_pending
+
+
+def test_digits_are_guessed():
+    state = PanelState("LOS 3 CERDITOS")
+    assert state.guess("3") == [4]
+    assert state.guess("3") == [] and list(state.pending) == [4]
+
+
+@pytest.mark.parametrize("char, expected", [
+    ("a", True), ("Ñ", True), ("É", True), ("3", True), (" ", False), ("?", False), ("Enter", False), ("", False),
+])
+def test_guessable(char, expected):
+    assert guessable(char) is expected
+
+
+def test_guessed_before():
+    state = PanelState("LOS 3 CERDITOS")
+    assert not state.guessed_before("s")
+    state.guess("S")
+    assert state.guessed_before("s")
+    assert state.guessed_before("Z") is False
+    state.guess("Z")
+    assert state.guessed_before("z")
+
+    # Digits are not in the letter masks; their cells tell
+    assert not state.guessed_before("3")
+    state.guess("3")
+    assert state.guessed_before("3")
+    assert not state.guessed_before("7")  # Not on the panel: a miss every time
+
+
+def test_reveal_next_in_guess_order():
+    state = PanelState("PAPA")
+    state.guess("A")
+    state.guess("P")
+    revealed = []
+    while (index := state.reveal_next()) is not None:
+        revealed.append(index)
+    assert revealed == [1, 3, 0, 2]
+    assert state.reveal_next() is None
+    assert state.solved
+
+
+def test_reveal_all():
+    state = PanelState("¿QUÉ TAL?")
+    state.guess("T")
+    assert state.reveal_all() == [1, 2, 3, 5, 6, 7]
+    assert not state.has_pending
+    assert state.solved
+    assert cells(state, SPECIAL) == [0, 8]
+    assert state.reveal_all() == []
+
+
+def test_solved_needs_pending_cells_shown():
+    state = PanelState("SOL")
+    for letter in "SOL":
+        state.guess(letter)
+    assert not state.solved
+    state.reveal_next()
+    state.reveal_next()
+    assert not state.solved
+    state.reveal_next()
+    assert state.solved
+
+
+def test_punctuation_only_panel_is_solved():
+    assert PanelState("¡¿?!").solved
+
+
+def test_letter_bits():
+    assert letter_bit("a") == letter_bit("Á") == letter_bit("à") == LETTER_BITS["A"]
+    assert letter_bit("ü") == LETTER_BITS["U"]
+    assert letter_bit("ñ") == letter_bit("Ñ") == LETTER_BITS["ñ"]
+    assert letter_bit("ñ") != letter_bit("n")
+    assert letter_bit("Enter") == 0
+    assert letter_bit("?") == 0
+    assert letter_bit("") == 0
+
+
+def test_letter_mask():
+    mask = letter_mask("¡Año 2024, señor!")
+    assert mask == sum(LETTER_BITS[letter] for letter in "AñOSER")
+    assert PanelState("¡Año 2024, señor!").letters == mask
+
+
+@pytest.mark.parametrize("char, expected", [("É", "E"), ("Ñ", "ñ"), ("ñ", "ñ"), ("Ü", "U"), ("A", "A"), ("?", "?")])
+def test_normalize_letter(char, expected):
+    assert normalize_letter(char) == expected
@@ -0,0 +1,81 @@
+import json
+import random
+
+import pytest
+
+from panel_state import layout_rows, letter_mask
+from phrase_bank import DIFFICULTY_LEVELS, LAYOUT_WIDTHS, PhraseBank, build_index, read_phrases
+
+ENTRIES = [
+    ("Más vale pájaro en mano que ciento volando", "Refranes"),
+    ("  a caballo   regalado no le mires el diente ", "Refranes"),
+    ("El Quijote", "Libros"),
+    ("Cien años de soledad", "Libros"),
+    ("", "Libros"),  # Skipped
+    ("Hola mundo", "Saludos"),
+]
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = str(tmp_path / "frases.rrpb")
+    assert build_index(ENTRIES, path) == 5
+    bank = PhraseBank(path)
+    yield bank
+    bank.close()
+
+
+def test_round_trip(bank):
+    phrases = [" ".join(phrase.upper().split()) for phrase, _ in ENTRIES if phrase.strip()]
+    assert len(bank) == len(phrases)
+    assert bank.categories == ["Refranes", "Libros", "Saludos"]
+    for index, phrase in enumerate(phrases):
+        assert bank.phrase(index) == phrase
+        assert bank.letters(index) == letter_mask(phrase)
+        assert bank.longest_word(index) == max(len(word) for word in phrase.split())
+        for width in LAYOUT_WIDTHS:
+            assert bank.rows(index, width) == len(layout_rows(phrase, width))
+    assert bank.category(2) == "Libros"
+    assert bank.difficulty(0) is None
+
+
+def test_random_phrase_fits(bank):
+    rng = random.Random(0)
+    for _ in range(50):
+        index = bank.random_index("Refranes", max_rows=4, max_chars_per_row=12, rng=rng)
+        assert bank.category(index) == "Refranes"
+        assert bank.rows(index, 12) <= 4
+    assert bank.random_index("Saludos", max_rows=0) is None
+    assert bank.random_index("Otra") is None
+    assert bank.count_fitting(max_rows=63, max_chars_per_row=8) == 5
+
+
+def test_scored_index(tmp_path):
+    path = str(tmp_path / "frases.rrpb")
+    build_index([("HOLA", "A", 10), ("ADIÓS", "A", 90.4)], path)
+    bank = PhraseBank(path)
+    assert bank.levels == list(DIFFICULTY_LEVELS)
+    assert [bank.difficulty(0), bank.difficulty(1)] == [10, 90]
+    assert bank.random_phrase("A", level=DIFFICULTY_LEVELS[-1]) == "ADIÓS"
+    bank.close()
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / "frases.rrpb"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        PhraseBank(str(path))
+
+
+def test_read_phrases(tmp_path):
+    text = tmp_path / "refranes.txt"
+    text.write_text("# comment\nSIN CATEGORÍA\n[Animales]\nPERRO LADRADOR\n", encoding="utf-8")
+    assert list(read_phrases(str(text))) == [("SIN CATEGORÍA", "refranes"), ("PERRO LADRADOR", "Animales")]
+
+    data = tmp_path / "frases.json"
+    data.write_text(json.dumps({"Comida": ["PAN", "VINO"]}), encoding="utf-8")
+    assert list(read_phrases(str(data))) == [("PAN", "Comida"), ("VINO", "Comida")]
+
+    table = tmp_path / "frases.csv"
+    table.write_text("frase,categoria\nHOLA,Saludos\nADIÓS,\n", encoding="utf-8")
+    assert list(read_phrases(str(table))) == [("HOLA", "Saludos"), ("ADIÓS", "frases")]
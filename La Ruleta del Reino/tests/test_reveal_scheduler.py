@@ -0,0 +1,78 @@
+import asyncio
+
+from panel_state import PanelState
+from reveal_scheduler import RevealScheduler
+
+INTERVAL = 0.01
+
+
+# Scheduler revealing a panel's pending letters, recording each tick
+def revealing(state, revealed):
+    def tick():
+        revealed.append(state.reveal_next())
+        return state.has_pending
+    return RevealScheduler(tick, interval=INTERVAL)
+
+
+def test_reveals_in_order_then_stops():
+    state = PanelState("BANANA")
+    state.guess("A")
+    revealed = []
+
+    async def run():
+        scheduler = revealing(state, revealed)
+        scheduler.start()
+        assert scheduler.running
+        assert revealed == []  # The first letter waits one interval
+        await asyncio.wait_for(scheduler.task, 1)
+        assert not scheduler.running
+        assert scheduler.task is None
+
+    asyncio.run(run())
+    assert revealed == [1, 3, 5]
+
+
+def test_cancel_reveals_nothing_more():
+    state = PanelState("BANANA")
+    state.guess("A")
+    revealed = []
+
+    async def run():
+        scheduler = revealing(state, revealed)
+        scheduler.start()
+        while not revealed:
+            await asyncio.sleep(INTERVAL / 4)
+        scheduler.cancel()
+        assert not scheduler.running
+        await asyncio.sleep(INTERVAL * 5)
+
+    asyncio.run(run())
+    assert revealed == [1]
+    assert list(state.pending) == [3, 5]
+
+
+def test_restart_while_running():
+    state = PanelState("BANANA")
+    state.guess("A")
+    revealed = []
+
+    async def run():
+        scheduler = revealing(state, revealed)
+        scheduler.start()
+        first = scheduler.task
+        while not revealed:
+            await asyncio.sleep(INTERVAL / 4)
+        state.guess("N")
+        scheduler.start()  # A new guess during the reveal: one run, not two
+        await asyncio.wait_for(scheduler.task, 1)
+        assert first.done()
+
+    asyncio.run(run())
+    assert revealed == [1, 3, 5, 2, 4]
+    assert state.solved is False  # "B" was never guessed
+
+
+def test_cancel_when_idle():
+    scheduler = RevealScheduler(lambda: False)
+    scheduler.cancel()
+    assert not scheduler.running
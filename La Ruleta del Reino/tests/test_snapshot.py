@@ -0,0 +1,72 @@
+import pytest
+
+from panel_state import HIDDEN, PENDING, REVEALED, PanelState, letter_bit
+from snapshot import decode, encode, from_text, to_text
+
+
+def game_in_progress():
+    state = PanelState("MÁS VALE PÁJARO EN MANO, QUE CIENTO VOLANDO")
+    state.guess("A")
+    state.reveal_next()
+    state.reveal_next()
+    state.guess("Ñ")  # Not in the phrase, only guessed
+    return state
+
+
+def test_round_trip():
+    state = game_in_progress()
+    restored = decode(encode(state))
+    assert restored.phrase == state.phrase
+    assert restored.states == state.states
+    assert list(restored.pending) == list(state.pending)
+    assert restored.guessed == state.guessed
+    assert restored.guessed & letter_bit("ñ")
+
+
+def test_round_trip_as_text():
+    state = game_in_progress()
+    text = to_text(state)
+    assert text.isascii()
+    assert from_text(text).states == state.states
+
+
+def test_new_and_solved_panels():
+    new = PanelState("HOLA MUNDO")
+    assert decode(encode(new)).states == new.states
+    assert HIDDEN in decode(encode(new)).states
+
+    solved = PanelState("HOLA MUNDO")
+    solved.reveal_all()
+    restored = decode(encode(solved))
+    assert restored.solved
+    assert PENDING not in restored.states and REVEALED in restored.states
+
+
+def test_truncated_snapshots():
+    data = encode(game_in_progress())
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            decode(data[:size])
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x09\x04\x00HOLA",  # Unknown version
+    b"\x01\x02\x00\xff\xfe" + bytes(8),  # Phrase is not UTF-8
+])
+def test_corrupt_snapshots(data):
+    with pytest.raises(ValueError):
+        decode(data)
+
+
+def test_pending_cell_must_be_hidden():
+    state = game_in_progress()
+    revealed = state.states.index(REVEALED)
+    state.pending.append(revealed)
+    with pytest.raises(ValueError):
+        decode(encode(state))
+
+
+def test_bad_text():
+    with pytest.raises(ValueError):
+        from_text("not a snapshot")
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from updates import UpdateBatch
+
+
+# Page that records its update() calls
+class RecordingPage:
+    def __init__(self):
+        self.calls = []
+
+    def update(self, *controls):
+        self.calls.append(controls)
+
+
+def control(uid):
+    return SimpleNamespace(uid=uid)
+
+
+def test_flush_sends_marked_controls_once():
+    page = RecordingPage()
+    updates = UpdateBatch(page)
+    a, b, c = control("_1"), control("_2"), control("_3")
+    updates.mark(a, b)
+    updates.mark(a)
+    updates.mark(c, b)
+    updates.flush()
+    assert page.calls == [(a, b, c)]
+    assert updates.controls_marked == 5
+    assert updates.patches_sent == 1
+    assert updates.controls_sent == 3
+
+
+def test_flush_without_changes_sends_nothing():
+    page = RecordingPage()
+    updates = UpdateBatch(page)
+    updates.flush()
+    updates.mark(control("_1"))
+    updates.flush()
+    updates.flush()
+    assert len(page.calls) == 1
+    assert updates.patches_sent == 1
+
+
+def test_controls_not_on_the_client_are_skipped():
+    page = RecordingPage()
+    updates = UpdateBatch(page)
+    added, new = control("_1"), control(None)
+    updates.mark(new)
+    updates.flush()
+    assert page.calls == []
+    assert updates.patches_sent == 0
+    assert updates.controls_marked == 1
+
+    # Not kept for later: it is sent with its parent
+    updates.mark(added)
+    updates.flush()
+    assert page.calls == [(added,)]
+    assert updates.controls_sent == 1
+
+
+def test_counters_add_up_over_flushes():
+    page = RecordingPage()
+    updates = UpdateBatch(page)
+    controls = [control(f"_{number}") for number in range(4)]
+    for first in range(3):
+        updates.mark(*controls[first:first + 2])
+        updates.flush()
+    assert [len(call) for call in page.calls] == [2, 2, 2]
+    assert updates.controls_marked == 6
+    assert updates.patches_sent == 3
+    assert updates.controls_sent == 6
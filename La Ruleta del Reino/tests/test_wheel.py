@@ -0,0 +1,40 @@
+import asyncio
+import random
+
+import wheel as wheel_module
+from wheel import WEDGES, FrameStats, Wheel, run_frames, wedge_at
+
+
+def test_only_sent_frames_are_recorded():
+    frames = iter([(True, True), (True, False), (True, False), (True, True), (False, True)])
+    stats = FrameStats()
+    asyncio.run(run_frames(lambda now: next(frames), stats, fps=1000))
+    assert stats.count == 3
+    assert [sample[1:] for sample in stats.samples] == [(1, 1)] * 3
+
+
+def test_spin_stats_match_the_frames_sent(monkeypatch):
+    # A short spin that slows down to steps under MIN_STEP
+    monkeypatch.setattr(wheel_module, "FRICTION", 4.0)
+    monkeypatch.setattr(wheel_module, "BRAKE", 20.0)
+    monkeypatch.setattr(wheel_module, "SPEED_RANGE", (2.0, 2.0))
+    sent = []
+    stopped = []
+
+    async def spin():
+        wheel = Wheel()
+        wheel.spin(sent.append, stopped.append, rng=random.Random(1))
+        await wheel.task
+        return wheel
+
+    wheel = asyncio.run(spin())
+    assert stopped == [wheel.wedge]
+    assert wheel.stats.count == len(sent)
+    assert sent and all(control is wheel.disc for control in sent)
+
+
+def test_wedge_at():
+    size = 2 * 3.141592653589793 / len(WEDGES)
+    assert wedge_at(0) == 0
+    assert wedge_at(-size * 1.5) == 1
+    assert wedge_at(size * 0.5) == len(WEDGES) - 1
@@ -0,0 +1,55 @@
+import pytest
+
+from panel_state import PanelState, letter_bit
+from word_index import WordIndex, build_index, panel_patterns, read_words
+
+WORDS = ["CASA", "COSA", "CAZA", "MAÑANA", "ÁRBOL", "PERRO", "CASA"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "palabras.rrwi")
+    assert build_index(WORDS, path) == 6  # Duplicates are indexed once
+    index = WordIndex(path)
+    yield index
+    index.close()
+
+
+def test_round_trip(index):
+    assert len(index) == 6
+    assert sorted(index.word(number) for number in range(len(index))) == sorted(set(WORDS))
+
+
+def test_candidates(index):
+    assert index.candidates(["C", None, None, "A"]) == (3, ["CASA", "CAZA", "COSA"])
+    # Hidden cells cannot hold a guessed letter
+    assert index.candidates(["C", None, None, "A"], letter_bit("O") | letter_bit("Z")) == (1, ["CASA"])
+    # Accents are ignored and Ñ is a letter of its own
+    assert index.candidates(["A", None, None, None, None]) == (1, ["ÁRBOL"])
+    assert index.candidates([None, None, "ñ", None, None, None]) == (1, ["MAÑANA"])
+    assert index.candidates([None, None, "N", None, None, None]) == (0, [])
+    assert index.candidates([None] * 9) == (0, [])
+
+
+def test_panel_patterns(index):
+    state = PanelState("¿LA CASA?")
+    state.guess("A")
+    assert panel_patterns(state) == [
+        (range(1, 3), [None, "A"]),
+        (range(4, 8), [None, "A", None, "A"]),
+    ]
+    count, words = index.candidates(panel_patterns(state)[1][1], state.guessed)
+    assert (count, words) == (2, ["CASA", "CAZA"])
+
+
+def test_read_words(tmp_path):
+    path = tmp_path / "es.dic"
+    path.write_text("3\ncasa/S\n# comment\nárbol/S\n", encoding="utf-8")
+    assert list(read_words(str(path))) == ["CASA", "ÁRBOL"]
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / "palabras.rrwi"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        WordIndex(str(path))